@@ -0,0 +1,354 @@
+"""
+Async HTTP API for running frameworks without the Streamlit UI.
+
+Endpoints:
+- POST /v1/runs: build the framework prompt for a task and run it, plus the
+  basic prompt unless include_basic is false. With "stream": true the
+  response is NDJSON: token events as text arrives, a result event per
+  prompt and a final done event.
+- GET /v1/frameworks: available frameworks and models
+- GET /healthz: liveness and current load
+- GET /metrics: Prometheus metrics, including the shared LLM call metrics
+
+The service is stateless, so it scales horizontally behind any load
+balancer. Each process runs at most API_MAX_CONCURRENCY runs at once; a run
+that cannot start within API_QUEUE_TIMEOUT_S is rejected with 429.
+
+Usage:
+    python api_server.py [--host 127.0.0.1] [--port 8080]
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import time
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import prompt_templates as templates
+import telemetry
+import tracing
+from backends import BackendRouter, load_backends
+from cassette import Cassette, RecordingClient, ReplayClient, REPLAY_PACE_INSTANT
+from constants import (
+    ALL_FRAMEWORKS,
+    API_MAX_CONCURRENCY,
+    API_QUEUE_TIMEOUT_S,
+    DEFAULT_LATENCY_SLO_P95_S
+)
+from llm_runner import LLMResult, call_llm_detailed, run_framework_stages
+from model_router import ModelRouter
+from run_journal import make_run_record, open_journal_from_env
+
+PREFERRED_MODEL = "gpt-4o"
+BASIC_LABEL = "Basic"
+API_RUN_MODE = "API"
+# Boolean request fields and their defaults
+RUN_FLAGS = {"include_basic": True, "multi_stage": False, "hedge": False, "stream": False}
+
+# (label, prompt, LLMResult) of every call a prompt of a run made
+RunCalls = Dict[str, List[Tuple[str, str, LLMResult]]]
+
+
+class _RunLimiter:
+    """Caps concurrent runs and counts those in progress."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+class _RunSlot:
+    """A limiter slot held until the request is done and every job has finished.
+
+    Jobs run on executor threads and cannot be cancelled, so a client that
+    disconnects mid-stream must not free the slot while they still call the
+    LLM. Used only from the event loop thread.
+    """
+
+    def __init__(self, limiter: _RunLimiter, on_finished: Optional[Callable[[], None]] = None):
+        self._limiter = limiter
+        self._on_finished = on_finished
+        self._jobs = 0
+        self._closed = False
+        self._released = False
+
+    def add_job(self):
+        self._jobs += 1
+
+    def job_done(self):
+        self._jobs -= 1
+        self._release_if_idle()
+
+    def close(self):
+        """Mark the request as done; the slot is freed once no job is running."""
+        self._closed = True
+        self._release_if_idle()
+
+    def _release_if_idle(self):
+        if self._closed and not self._jobs and not self._released:
+            self._released = True
+            self._limiter.release()
+            if self._on_finished is not None:
+                self._on_finished()
+
+
+LIMITER = _RunLimiter(int(os.environ.get("API_MAX_CONCURRENCY", API_MAX_CONCURRENCY)))
+BACKENDS = BackendRouter(load_backends())
+ROUTER = ModelRouter(models=BACKENDS.models)
+JOURNAL = open_journal_from_env()
+DEFAULT_MODEL = PREFERRED_MODEL if PREFERRED_MODEL in BACKENDS.models else BACKENDS.models[0]
+_client = None
+
+
+def get_client():
+    """Create the API client once, honoring CASSETTE_MODE like the UI."""
+    global _client
+    if _client is None:
+        mode = os.environ.get("CASSETTE_MODE", "live").lower()
+        cassette_path = os.environ.get("CASSETTE_PATH", os.path.join("cassettes", "recorded.jsonl"))
+        if mode == "replay":
+            _client = ReplayClient(Cassette(cassette_path), pace=os.environ.get("REPLAY_PACE", REPLAY_PACE_INSTANT))
+        elif mode == "record":
+            _client = RecordingClient(BACKENDS, Cassette(cassette_path))
+        else:
+            _client = BACKENDS
+    return _client
+
+
+def _result_payload(label: str, result: LLMResult, **extra: Any) -> Dict[str, Any]:
+    return dict(event="result", label=label, **asdict(result), **extra)
+
+
+def parse_run_request(body: Any) -> Dict[str, Any]:
+    """Validate a run request and build its prompts.
+
+    Raises:
+        ValueError: If the body is not an object or a field is missing or invalid
+    """
+    if not isinstance(body, dict):
+        raise ValueError("body must be a JSON object")
+    task = body.get("task")
+    if not isinstance(task, str) or not task.strip():
+        raise ValueError("task must be a non-empty string")
+    framework = body.get("framework")
+    if framework not in ALL_FRAMEWORKS:
+        raise ValueError(f"framework must be one of: {', '.join(ALL_FRAMEWORKS)}")
+    model = body.get("model") or DEFAULT_MODEL
+    if model not in BACKENDS.models:
+        raise ValueError(f"model must be one of: {', '.join(BACKENDS.models)}")
+    temperature = body.get("temperature", 0.7)
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not 0.0 <= temperature <= 2.0:
+        raise ValueError("temperature must be a number between 0 and 2")
+    flags = {name: body.get(name, default) for name, default in RUN_FLAGS.items()}
+    for name, value in flags.items():
+        if not isinstance(value, bool):
+            raise ValueError(f"{name} must be true or false")
+
+    prompts = {framework: templates.build_framework_prompt(framework, task)}
+    if flags["include_basic"]:
+        prompts = {BASIC_LABEL: task, **prompts}
+    return {
+        "task": task,
+        "framework": framework,
+        "model": model,
+        "temperature": float(temperature),
+        "prompts": prompts,
+        "multi_stage": flags["multi_stage"],
+        "hedge": flags["hedge"],
+        "stream": flags["stream"]
+    }
+
+
+def _make_job(
+    run: Dict[str, Any],
+    label: str,
+    on_token: Optional[Callable[[str], None]],
+    calls: RunCalls
+) -> Callable[[], Dict[str, Any]]:
+    """Return a blocking callable producing the result event for one prompt.
+
+    The calls it made are stored in calls[label] for the run journal.
+    """
+    def job() -> Dict[str, Any]:
+        if label != BASIC_LABEL and run["multi_stage"]:
+            output, intermediate, stages = run_framework_stages(
+                get_client(), run["framework"], run["task"], run["model"], run["temperature"],
+                router=ROUTER, slo_p95_s=DEFAULT_LATENCY_SLO_P95_S, hedge=run["hedge"]
+            )
+            calls[label] = [(stage["stage"], stage["prompt"], stage["result"]) for stage in stages]
+            final = stages[-1]["result"]
+            return _result_payload(
+                label, final, intermediate=intermediate,
+                stages=[{"stage": s["stage"], "role": s["role"], **asdict(s["result"])} for s in stages]
+            )
+        result = call_llm_detailed(
+            get_client(), run["prompts"][label], run["model"], run["temperature"],
+            on_token=on_token, hedge=run["hedge"], framework=label
+        )
+        calls[label] = [(label, run["prompts"][label], result)]
+        return _result_payload(label, result)
+    return job
+
+
+def _journal_run(run: Dict[str, Any], calls: RunCalls, run_id: str, trace_id: str):
+    """Queue a finished run for the journal, basic call first like the UI's runs."""
+    ordered = [call for label in run["prompts"] for call in calls.get(label, [])]
+    if JOURNAL is None or not ordered:
+        return
+    JOURNAL.append(make_run_record(
+        API_RUN_MODE, run["framework"], run["model"], run["temperature"], ordered, run_id=run_id, trace_id=trace_id
+    ))
+
+
+async def _run_events(run: Dict[str, Any], stream: bool, slot: _RunSlot, calls: RunCalls) -> AsyncIterator[Dict[str, Any]]:
+    """Run every prompt of a request concurrently and yield events as they happen.
+
+    Each job is registered with slot, which stays held until the job finishes
+    even if the caller stops iterating.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_token_for(label: str) -> Optional[Callable[[str], None]]:
+        if not stream:
+            return None
+        return lambda token: loop.call_soon_threadsafe(events.put_nowait, {"event": "token", "label": label, "text": token})
+
+    def finish(label: str, future: asyncio.Future):
+        error = future.exception()
+        if error is not None:
+            events.put_nowait({"event": "error", "label": label, "error": f"{type(error).__name__}: {error}"})
+        else:
+            events.put_nowait(future.result())
+        slot.job_done()
+
+    for label in run["prompts"]:
+        job = _make_job(run, label, on_token_for(label), calls)
+        # Copy the context so the worker's spans join this request's trace
+        future = loop.run_in_executor(None, contextvars.copy_context().run, job)
+        slot.add_job()
+        future.add_done_callback(lambda f, label=label: finish(label, f))
+
+    pending = len(run["prompts"])
+    while pending:
+        event = await events.get()
+        if event["event"] in ("result", "error"):
+            pending -= 1
+        yield event
+
+
+async def runs(request: Request) -> Response:
+    started = time.perf_counter()
+    try:
+        run = parse_run_request(await request.json())
+    except json.JSONDecodeError:
+        return _finish("/v1/runs", started, JSONResponse({"error": "body must be JSON"}, status_code=400))
+    except ValueError as e:
+        return _finish("/v1/runs", started, JSONResponse({"error": str(e)}, status_code=400))
+
+    if not await LIMITER.acquire(API_QUEUE_TIMEOUT_S):
+        return _finish("/v1/runs", started, JSONResponse(
+            {"error": "too many concurrent runs"}, status_code=429, headers={"Retry-After": "1"}
+        ))
+
+    run_id = os.urandom(8).hex()
+    calls: RunCalls = {}
+    trace_ids: List[str] = []
+    # Journaled once every job has finished, even if a streaming client left early
+    slot = _RunSlot(LIMITER, on_finished=lambda: _journal_run(run, calls, run_id, "".join(trace_ids)))
+    trace_attributes = {"run.id": run_id, "api.framework": run["framework"]}
+    if not run["stream"]:
+        try:
+            with tracing.span("api.run", trace_attributes=trace_attributes) as span:
+                trace_ids.append(span.trace.trace_id)
+                results = [event async for event in _run_events(run, stream=False, slot=slot, calls=calls)]
+        finally:
+            slot.close()
+        failed = any(event["event"] == "error" for event in results)
+        response = JSONResponse(
+            {"framework": run["framework"], "model": run["model"], "prompts": run["prompts"], "results": results},
+            status_code=502 if failed else 200
+        )
+        return _finish("/v1/runs", started, response)
+
+    async def body() -> AsyncIterator[str]:
+        failed = False
+        try:
+            with tracing.span("api.run", trace_attributes=trace_attributes) as span:
+                trace_ids.append(span.trace.trace_id)
+                yield json.dumps({"event": "prompts", "framework": run["framework"], "model": run["model"], "prompts": run["prompts"]}) + "\n"
+                async for event in _run_events(run, stream=True, slot=slot, calls=calls):
+                    failed = failed or event["event"] == "error"
+                    yield json.dumps(event, default=str) + "\n"
+                yield json.dumps({"event": "done"}) + "\n"
+        finally:
+            # Jobs still running after a disconnect keep the slot until they finish
+            slot.close()
+            # The 200 went out with the headers; record what the run actually did
+            telemetry.record_api_request("/v1/runs", 502 if failed else 200, time.perf_counter() - started)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+def _finish(route: str, started: float, response: Response) -> Response:
+    telemetry.record_api_request(route, response.status_code, time.perf_counter() - started)
+    return response
+
+
+async def frameworks(request: Request) -> Response:
+    return JSONResponse({"frameworks": ALL_FRAMEWORKS, "models": BACKENDS.models, "default_model": DEFAULT_MODEL})
+
+
+async def healthz(request: Request) -> Response:
+    return JSONResponse({"status": "ok", "in_flight": LIMITER.in_flight, "max_concurrency": LIMITER.limit})
+
+
+async def metrics(request: Request) -> Response:
+    body = telemetry.render_prometheus() + "\n".join([
+        "# HELP api_runs_in_flight Framework runs currently executing in this process.",
+        "# TYPE api_runs_in_flight gauge",
+        f"api_runs_in_flight {LIMITER.in_flight}"
+    ]) + "\n"
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+app = Starlette(routes=[
+    Route("/v1/runs", runs, methods=["POST"]),
+    Route("/v1/frameworks", frameworks),
+    Route("/healthz", healthz),
+    Route("/metrics", metrics)
+])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve framework runs over HTTP.")
+    parser.add_argument("--host", default=os.environ.get("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("API_PORT", "8080")))
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
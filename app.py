@@ -10,7 +10,6 @@ Supports two modes:
 """
 
 import streamlit as st
-from openai import OpenAI
 from typing import Dict, Any, Optional
 import os
 from dotenv import load_dotenv
@@ -24,14 +23,56 @@ from constants import (
     FRAMEWORK_REFLECTION_REVISION,
     ALL_FRAMEWORKS,
     TEXTAREA_RESIZE_INTERVAL_MS,
-    AVAILABLE_MODELS
+    DEFAULT_LATENCY_SLO_P95_S,
+    LONG_INPUT_CHUNK_CHARS,
+    OUTPUT_PAGE_CHARS,
+    OUTPUT_REFRESH_INTERVAL_S,
+    PREFETCH_BUDGET_USD,
+    PREFETCH_MAX_UNPRICED_CALLS,
+    PREFETCH_TTL_S
 )
 import prompt_templates as templates
+from llm_runner import call_llm_detailed, run_framework_stages, run_map_reduce, run_parallel
+from run_journal import RunJournal, make_run_record, open_journal_from_env
+from run_history import HistoryStore, RunHistory, make_history_record
+from cassette import Cassette, CassetteMiss, RecordingClient, ReplayClient, REPLAY_PACE_INSTANT, REPLAY_PACE_RECORDED
+from model_router import ModelRouter
+from backends import BackendRouter, is_live_client, load_backends
+from prefetch import Prefetcher
+from scenario_search import BM25Index, build_scenario_index
+from hedging import HEDGE_STATS
+import telemetry
+import tracing
+import profiling
 import html
+import threading
+import time
+import uuid
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 
-# Default model selection
+# Default model and temperature selection
 DEFAULT_MODEL = "gpt-4o"
+DEFAULT_TEMPERATURE = 0.7
+
+# Online run modes
+RUN_MODE_SINGLE = "Single Framework"
+RUN_MODE_ALL_FRAMEWORKS = "All Frameworks"
+RUN_MODE_MULTI_MODEL = "Multiple Models"
+RUN_MODES = [RUN_MODE_SINGLE, RUN_MODE_ALL_FRAMEWORKS, RUN_MODE_MULTI_MODEL]
+
+# Label for the baseline (non-framework) prompt in grids and telemetry
+BASIC_LABEL = "Basic"
+
+# API backends for online mode
+BACKEND_LIVE = "live"
+BACKEND_RECORD = "record"
+BACKEND_REPLAY = "replay"
+BACKEND_LABELS = {
+    BACKEND_LIVE: "Live API",
+    BACKEND_RECORD: "Live API + Record",
+    BACKEND_REPLAY: "Replay Cassette"
+}
 
 # Custom CSS for UI styling
 CUSTOM_CSS = """
@@ -79,6 +120,7 @@ CUSTOM_CSS = """
 """
 
 
+@tracing.traced()
 def escape_for_display(text: str) -> str:
     """Escape text for safe HTML display, including $ character.
     
@@ -97,90 +139,330 @@ def escape_for_display(text: str) -> str:
     text = text.replace('$', '&#36;')
     return text
 
+class OutputRenderer:
+    """Render an output container incrementally, escaping only new text.
+    
+    Text is laid out in pages of about OUTPUT_PAGE_CHARS characters. Only the
+    page being filled is redrawn as text arrives; full pages are left as they
+    are, and pages after the first go into collapsed expanders so long
+    outputs stay light in the browser.
+    
+    Streamed tokens may arrive on worker threads, which cannot draw. They
+    are buffered and drawn by the next flush() on the script thread.
+    """
+    
+    def __init__(self, css_class: str, page_chars: int = OUTPUT_PAGE_CHARS):
+        self.css_class = css_class
+        self.page_chars = page_chars
+        self._lock = threading.Lock()
+        self._pending = []
+        self._streamed = []
+        self._last_flush = 0.0
+        self._slot = st.empty()
+        self._reset()
+    
+    def _reset(self):
+        self._root = self._slot.container()
+        self._pages = 0
+        self._page = None
+        self._page_html = ""
+        self._page_len = 0
+        self._new_page()
+    
+    def _new_page(self):
+        self._pages += 1
+        parent = self._root if self._pages == 1 else self._root.expander(f"📄 Part {self._pages}", expanded=False)
+        self._page = parent.empty()
+        self._page_html = ""
+        self._page_len = 0
+    
+    def _draw(self):
+        self._page.markdown(f'<div class="output-container {self.css_class}">{self._page_html}</div>', unsafe_allow_html=True)
+    
+    def on_token(self, delta: str):
+        """Buffer a streamed delta and redraw if due and on the script thread."""
+        with self._lock:
+            self._pending.append(delta)
+            self._streamed.append(delta)
+        if get_script_run_ctx() is not None and time.monotonic() - self._last_flush >= OUTPUT_REFRESH_INTERVAL_S:
+            self.flush()
+    
+    def flush(self):
+        """Escape buffered text, append it to the current page and redraw it."""
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending.clear()
+        self._last_flush = time.monotonic()
+        if not text:
+            return
+        while text:
+            room = self.page_chars - self._page_len
+            if room <= 0:
+                self._draw()
+                self._new_page()
+                continue
+            piece = text[:room]
+            if len(text) > room:
+                # End the page at a line break near the limit when there is one
+                cut = piece.rfind("\n", room * 4 // 5)
+                if cut != -1:
+                    piece = piece[:cut + 1]
+            self._page_html += escape_for_display(piece)
+            self._page_len += len(piece)
+            text = text[len(piece):]
+            if text:
+                # Whatever is left starts on the next page
+                self._page_len = self.page_chars
+        self._draw()
+    
+    def finish(self, text: str):
+        """Complete a streamed output, redrawing from scratch if the final text differs."""
+        self.flush()
+        if "".join(self._streamed) != text:
+            self._streamed = []
+            self._reset()
+            self.render(text)
+    
+    def render(self, text: str):
+        """Render a complete output."""
+        with self._lock:
+            self._pending.append(text)
+        self.flush()
+
+
+@telemetry.timed_render
+def render_output(text: str, css_class: str = "output-framework"):
+    """Render a complete output in a paginated output container."""
+    OutputRenderer(css_class).render(text)
+
 # Load environment variables from .env file
 load_dotenv()
 
 
-# Initialize OpenAI client
 @st.cache_resource
-def get_openai_client():
-    """Initialize and cache the OpenAI client."""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
+def get_backend_router() -> BackendRouter:
+    """Load the inference backend registry once per process.
+    
+    Raises:
+        ValueError: If the registry configuration is invalid
+    """
+    return BackendRouter(load_backends())
+
+
+def get_available_models() -> list:
+    """Return the models served by the backend registry, for the sidebar."""
+    try:
+        return get_backend_router().models
+    except ValueError as e:
+        st.error(f"Invalid backend registry: {str(e)}")
+        st.stop()
+
+
+# Initialize the live client
+def get_openai_client() -> BackendRouter:
+    """Return the client routing each model to its backend."""
+    try:
+        router = get_backend_router()
+    except ValueError as e:
+        st.error(f"Invalid backend registry: {str(e)}")
+        st.stop()
+    if router.requires_openai_key and not os.environ.get("OPENAI_API_KEY"):
         st.error("OPENAI_API_KEY environment variable not set")
         st.stop()
-    return OpenAI(api_key=api_key)
+    return router
 
 
-def call_llm(client: OpenAI, prompt: str, model: str, temperature: float = 0.7) -> str:
-    """
-    Call the OpenAI API with the given prompt.
+@st.cache_resource
+def get_cassette() -> Cassette:
+    """Open the cassette file configured by CASSETTE_PATH."""
+    return Cassette(os.environ.get("CASSETTE_PATH", os.path.join("cassettes", "recorded.jsonl")))
+
+
+def get_api_client():
+    """Return the client for the API backend selected in the sidebar."""
+    backend = st.session_state.api_backend
+    if backend == BACKEND_REPLAY:
+        return ReplayClient(get_cassette(), pace=st.session_state.replay_pace)
+    if backend == BACKEND_RECORD:
+        return RecordingClient(get_openai_client(), get_cassette())
+    return get_openai_client()
+
+
+@st.cache_resource
+def start_telemetry_exporters():
+    """Start the metrics file writer and HTTP endpoint once per process, if configured."""
+    port = os.environ.get("METRICS_PORT")
+    telemetry.start_exporters(
+        metrics_file=os.environ.get("METRICS_FILE"),
+        port=int(port) if port else None,
+        host=os.environ.get("METRICS_HOST", "127.0.0.1")
+    )
+
+
+@st.cache_resource
+def get_run_journal() -> Optional[RunJournal]:
+    """Open the run journal shared by all sessions, unless disabled."""
+    return open_journal_from_env()
+
+
+def journal_run(framework: str, model: str, temperature: float, calls: list):
+    """Queue an online run for the journal; never blocks on disk."""
+    journal = get_run_journal()
+    if journal is None or not calls:
+        return
+    script_ctx = get_script_run_ctx()
+    span = tracing.current_span()
+    journal.append(make_run_record(
+        st.session_state.run_mode,
+        framework,
+        model,
+        temperature,
+        calls,
+        session_id=script_ctx.session_id if script_ctx else "",
+        trace_id=span.trace.trace_id if span else ""
+    ))
+
+
+@st.cache_resource
+def get_history_store() -> Optional[HistoryStore]:
+    """Open the store that older runs of every session spill to, unless disabled."""
+    if os.environ.get("RUN_HISTORY_SPILL", "1").lower() in ("0", "false", "no"):
+        return None
+    path = os.environ.get("RUN_HISTORY_PATH", os.path.join("runs", "history.sqlite3"))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return HistoryStore(path)
+
+
+def get_run_history() -> RunHistory:
+    """Return this session's run history, creating it on first use."""
+    if st.session_state.run_history is None:
+        script_ctx = get_script_run_ctx()
+        session_id = script_ctx.session_id if script_ctx else uuid.uuid4().hex
+        st.session_state.run_history = RunHistory(session_id, get_history_store())
+    return st.session_state.run_history
+
+
+def record_run(framework: str, model: str, temperature: float, calls: list):
+    """Add an online run to the journal and to this session's history."""
+    journal_run(framework, model, temperature, calls)
+    if calls:
+        get_run_history().add(make_history_record(st.session_state.run_mode, framework, model, temperature, calls))
+
+
+@st.cache_resource
+def get_model_router() -> ModelRouter:
+    """Create the model router shared by all sessions."""
+    return ModelRouter(models=get_available_models())
+
+
+@st.cache_resource
+def get_prefetcher() -> Prefetcher:
+    """Create the prefetch cache shared by all sessions."""
+    return Prefetcher(
+        ttl_s=float(os.environ.get("PREFETCH_TTL_S", PREFETCH_TTL_S)),
+        budget_usd=float(os.environ.get("PREFETCH_BUDGET_USD", PREFETCH_BUDGET_USD)),
+        max_unpriced_calls=int(os.environ.get("PREFETCH_MAX_UNPRICED_CALLS", PREFETCH_MAX_UNPRICED_CALLS))
+    )
+
+
+def prefetch_samples(framework: str, model: str, temperature: float):
+    """Prefetch the basic and framework responses of sample prompts in the background.
     
-    Args:
-        client: OpenAI client instance
-        prompt: The prompt to send
-        model: Model identifier
-        temperature: Sampling temperature
-        
-    Returns:
-        The LLM response text
-        
-    Raises:
-        ValueError: If prompt is empty, None, or model is not specified
-        Exception: If OpenAI API call fails
+    Covers the selected framework while prefetch is on, or every framework
+    from the first page load when PREFETCH_SAMPLES=all. Only the live API
+    backend is prefetched, and nothing is prefetched while the backends are
+    not usable (no API key, invalid registry); offline mode must keep
+    working without them.
     """
-    # Input validation
-    if not prompt or not prompt.strip():
-        raise ValueError("Prompt cannot be empty")
-    
-    if not model:
-        raise ValueError("Model must be specified")
+    prefetch_all = os.environ.get("PREFETCH_SAMPLES", "").lower() == "all"
+    if st.session_state.api_backend != BACKEND_LIVE:
+        return
+    if st.session_state.mode == 'offline' and not prefetch_all:
+        return
+    if st.session_state.mode == 'online' and not st.session_state.prefetch_samples:
+        return
+    try:
+        client = get_backend_router()
+    except ValueError:
+        return
+    if client.requires_openai_key and not os.environ.get("OPENAI_API_KEY"):
+        return
+    if st.session_state.mode == 'offline':
+        # Warm the responses online mode will ask for with its default settings
+        model = DEFAULT_MODEL if DEFAULT_MODEL in client.models else client.models[0]
+        temperature = DEFAULT_TEMPERATURE
     
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature
-    )
-    return response.choices[0].message.content
+    prefetcher = get_prefetcher()
+    for name in (ALL_FRAMEWORKS if prefetch_all else [framework]):
+        try:
+            task = get_sample_task(name)
+        except ValueError:
+            continue
+        prefetcher.schedule(client, task, model, temperature, BASIC_LABEL)
+        prefetcher.schedule(client, templates.build_framework_prompt(name, task), model, temperature, name)
+
+
+def get_prefetched(client, prompt: str, model: str, temperature: float) -> Optional[tuple]:
+    """Return a fresh prefetched (LLMResult, age in seconds) for a prompt, if prefetch is on."""
+    if not st.session_state.prefetch_samples or not is_live_client(client):
+        return None
+    return get_prefetcher().get(client, prompt, model, temperature)
+
+
+@st.cache_resource
+def get_scenario_index() -> BM25Index:
+    """Build the full-text index over the scenario pack once per process."""
+    return build_scenario_index(sample_data.get_pack().iter_scenarios())
+
 
+def search_scenarios(query: str) -> list:
+    """Rank scenarios of every framework against a query.
+    
+    Returns:
+        Index entries (id, framework, title, industry) of the best matches
+    """
+    pack = sample_data.get_pack()
+    return [pack.metadata(scenario_id) for scenario_id, _ in get_scenario_index().search(query)]
 
 
 # Generic sample data accessor
-def _get_sample_data(framework: str, data_dict: dict, data_name: str):
-    """Generic function to access sample data dictionaries.
+def _get_sample_data(framework: str, field: str, data_name: str):
+    """Generic function to read a field of a framework's default sample scenario.
     
     Args:
         framework: Framework name
-        data_dict: Dictionary to access
+        field: Scenario field to read
         data_name: Name of data type for error messages
         
     Returns:
-        Data from dictionary
+        Field value from the scenario pack
         
     Raises:
-        ValueError: If framework not found
+        ValueError: If framework or field not found
     """
-    if framework not in data_dict:
+    scenario = sample_data.get_scenario(framework)
+    if field not in scenario:
         raise ValueError(f"No {data_name} found for framework: {framework}")
-    return data_dict[framework]
+    return scenario[field]
 
 
 # Convenience accessors using the generic function
 def get_sample_task(framework: str) -> str:
     """Get sample task for a framework."""
-    return _get_sample_data(framework, sample_data.SAMPLE_TASKS, "sample task")
+    return _get_sample_data(framework, "task", "sample task")
 
 
 def get_basic_output(framework: str) -> str:
     """Get basic output for a framework."""
-    return _get_sample_data(framework, sample_data.BASIC_OUTPUTS, "basic output")
+    return _get_sample_data(framework, "basic_output", "basic output")
 
 
 def get_framework_output(framework: str) -> str:
     """Get framework output for a framework."""
-    return _get_sample_data(framework, sample_data.FRAMEWORK_OUTPUTS, "framework output")
+    return _get_sample_data(framework, "framework_output", "framework output")
 
 
+@tracing.traced("prompt.build")
 def get_framework_prompt(framework: str, mode: str = 'online') -> str:
     """Get the framework-enhanced prompt for a framework.
     
@@ -192,14 +474,50 @@ def get_framework_prompt(framework: str, mode: str = 'online') -> str:
         Framework-enhanced prompt
     """
     if mode == 'offline':
-        return _get_sample_data(framework, sample_data.OFFLINE_FRAMEWORK_PROMPTS, "offline framework prompt")
+        return _get_sample_data(framework, "framework_prompt", "offline framework prompt")
     else:
-        return _get_sample_data(framework, sample_data.FRAMEWORK_PROMPTS, "framework prompt")
+        return templates.build_framework_prompt(framework, get_sample_task(framework))
 
 
 def get_intermediate_data(framework: str) -> Optional[Dict[str, Any]]:
     """Get intermediate data for a framework if it exists."""
-    return sample_data.INTERMEDIATE_DATA.get(framework)
+    return sample_data.get_scenario(framework).get("intermediate")
+
+
+def get_offline_scenario(framework: str, scenario_id: Optional[str] = None) -> Dict[str, Any]:
+    """Get an offline scenario from the scenario pack or the cassette.
+    
+    Args:
+        framework: Framework name
+        scenario_id: Id of a pack or recorded scenario; None or an unknown id
+            selects the framework's default scenario
+        
+    Returns:
+        Scenario dict with task, framework_prompt, basic_output,
+        framework_output and intermediate
+    """
+    for scenario in get_cassette().scenarios(framework):
+        if scenario["id"] == scenario_id:
+            return scenario
+    if any(entry["id"] == scenario_id for entry in sample_data.list_scenarios(framework)):
+        return sample_data.get_scenario(framework, scenario_id)
+    return sample_data.get_scenario(framework)
+
+
+def record_scenario(framework: str, model: str, task: str, framework_task: str,
+                    basic_output: str, framework_output: str, intermediate: Optional[Dict[str, Any]]):
+    """Save a recorded online run as an offline scenario."""
+    title = " ".join(task.split())
+    get_cassette().record_scenario({
+        "title": title if len(title) <= 60 else title[:57] + "...",
+        "framework": framework,
+        "model": model,
+        "task": task,
+        "framework_prompt": framework_task,
+        "basic_output": basic_output,
+        "framework_output": framework_output,
+        "intermediate": intermediate
+    })
 
 
 def setup_page_config():
@@ -241,7 +559,21 @@ def initialize_session_state():
         'basic_prompt_input': '',
         'framework_prompt_input': '',
         'previous_framework': None,
-        'show_clear_dialog': False
+        'show_clear_dialog': False,
+        'run_mode': RUN_MODE_SINGLE,
+        'compare_models': [DEFAULT_MODEL, "gpt-4o-mini"],
+        'multi_stage': False,
+        'latency_slo': DEFAULT_LATENCY_SLO_P95_S,
+        'hedge_requests': os.environ.get("HEDGE_REQUESTS", "").lower() in ("1", "true", "yes"),
+        'api_backend': os.environ.get("CASSETTE_MODE", BACKEND_LIVE).lower(),
+        'replay_pace': os.environ.get("REPLAY_PACE", REPLAY_PACE_INSTANT).lower(),
+        'offline_scenario': None,
+        'scenario_query': '',
+        'long_input': False,
+        'long_input_chunk_chars': LONG_INPUT_CHUNK_CHARS,
+        'run_history': None,
+        'history_view': [],
+        'prefetch_samples': os.environ.get("PREFETCH_SAMPLES", "").lower() in ("1", "true", "yes", "all")
     }
     
     for key, default_value in defaults.items():
@@ -249,6 +581,8 @@ def initialize_session_state():
             st.session_state[key] = default_value
 
 
+@tracing.traced()
+@telemetry.timed_render
 def render_sidebar(framework: str) -> tuple:
     """Render sidebar controls and return selected settings.
     
@@ -278,14 +612,15 @@ def render_sidebar(framework: str) -> tuple:
         st.sidebar.subheader("Online Mode Settings")
         
         # Find default model index, fallback to 0 if not found
+        models = get_available_models()
         try:
-            default_index = AVAILABLE_MODELS.index(DEFAULT_MODEL)
+            default_index = models.index(DEFAULT_MODEL)
         except ValueError:
             default_index = 0
         
         model = st.sidebar.selectbox(
             "Model",
-            AVAILABLE_MODELS,
+            models,
             index=default_index
         )
         
@@ -293,16 +628,122 @@ def render_sidebar(framework: str) -> tuple:
             "Temperature",
             min_value=0.0,
             max_value=2.0,
-            value=0.7,
+            value=DEFAULT_TEMPERATURE,
             step=0.1
         )
         
+        st.sidebar.selectbox(
+            "API Backend",
+            list(BACKEND_LABELS),
+            format_func=BACKEND_LABELS.get,
+            key="api_backend",
+            help="Record live runs into the cassette file, or replay them without calling the API."
+        )
+        if st.session_state.api_backend == BACKEND_REPLAY:
+            st.sidebar.radio(
+                "Replay Pace",
+                [REPLAY_PACE_INSTANT, REPLAY_PACE_RECORDED],
+                format_func=str.capitalize,
+                key="replay_pace",
+                horizontal=True
+            )
+        
+        st.sidebar.radio(
+            "Run Mode",
+            RUN_MODES,
+            key="run_mode",
+            help="Compare one framework, every framework, or several models in a single run."
+        )
+        if st.session_state.run_mode == RUN_MODE_MULTI_MODEL:
+            # Drop defaults the backend registry does not serve
+            st.session_state.compare_models = [m for m in st.session_state.compare_models if m in models]
+            st.sidebar.multiselect(
+                "Models to Compare",
+                models,
+                key="compare_models"
+            )
+        elif st.session_state.run_mode == RUN_MODE_SINGLE:
+            st.sidebar.checkbox(
+                "🧭 Multi-Stage Routing",
+                key="multi_stage",
+                help="Run multi-stage frameworks as separate calls and route each stage to a model by cost, quality and measured latency."
+            )
+            if st.session_state.multi_stage:
+                st.sidebar.number_input(
+                    "Latency SLO p95 (s)",
+                    min_value=1.0,
+                    max_value=120.0,
+                    step=1.0,
+                    key="latency_slo"
+                )
+            st.sidebar.checkbox(
+                "📚 Long-Input Mode",
+                key="long_input",
+                help="Split long basic prompts into chunks, run each chunk with the framework's instructions in parallel, then merge the partial results."
+            )
+            if st.session_state.long_input:
+                st.sidebar.number_input(
+                    "Chunk Size (characters)",
+                    min_value=500,
+                    max_value=50000,
+                    step=500,
+                    key="long_input_chunk_chars"
+                )
+            st.sidebar.checkbox(
+                "🚀 Prefetch Sample Responses",
+                key="prefetch_samples",
+                help="Generate the sample prompt's basic and framework responses in the background, so Run shows them immediately."
+            )
+            if st.session_state.prefetch_samples:
+                prefetch_stats = get_prefetcher().snapshot()
+                st.sidebar.caption(
+                    f"{prefetch_stats['cached']} responses ready, {prefetch_stats['pending']} in progress · "
+                    f"${prefetch_stats['spent_usd']:.4f} of ${prefetch_stats['budget_usd']:.2f} prefetch budget spent."
+                    + (f" {prefetch_stats['unpriced_calls']} of {prefetch_stats['max_unpriced_calls']} calls to unpriced models used." if prefetch_stats['unpriced_calls'] else "")
+                    + (" Budget reached; prefetching paused." if prefetch_stats['spent_usd'] >= prefetch_stats['budget_usd'] else "")
+                )
+                if st.sidebar.button("🔄 Refresh Prefetched", use_container_width=True):
+                    get_prefetcher().clear()
+        
+        st.sidebar.checkbox(
+            "⚡ Hedge Slow Requests",
+            key="hedge_requests",
+            help="Fire a duplicate request when the first token is later than this model's p90 TTFT; the first to finish wins."
+        )
+        if st.session_state.hedge_requests:
+            hedge_stats = HEDGE_STATS.snapshot()
+            st.sidebar.caption(
+                f"Hedged {hedge_stats['hedges_fired']} of {hedge_stats['requests']} requests "
+                f"({hedge_stats['hedge_rate']:.0%}); the hedge won {hedge_stats['hedges_won']} times "
+                f"({hedge_stats['win_rate']:.0%})."
+            )
+        
+        query = st.sidebar.text_input(
+            "🔎 Search Scenarios",
+            key="scenario_query",
+            placeholder="e.g. budget, onboarding, outage",
+            help="Search every scenario's task and outputs. The selected result is used by Load Sample Prompt."
+        )
+        search_result = None
+        if query.strip():
+            results = {entry["id"]: f"{entry['title']} · {entry['framework']}" for entry in search_scenarios(query)}
+            if results:
+                search_result = st.sidebar.selectbox("Results", list(results), format_func=results.get)
+            else:
+                st.sidebar.caption("No matching scenarios.")
+        
         load_sample_button = st.sidebar.button("📋 Load Sample Prompt", use_container_width=True)
         if load_sample_button:
             try:
-                sample_task = get_sample_task(framework)
-                st.session_state.basic_prompt_input = sample_task
-                st.session_state.framework_prompt_input = get_framework_prompt(framework, mode='online')
+                if search_result:
+                    # A search result's task is framed for the framework selected here
+                    sample_task = sample_data.get_pack().get(search_result)["task"]
+                    st.session_state.basic_prompt_input = sample_task
+                    st.session_state.framework_prompt_input = templates.build_framework_prompt(framework, sample_task)
+                else:
+                    sample_task = get_sample_task(framework)
+                    st.session_state.basic_prompt_input = sample_task
+                    st.session_state.framework_prompt_input = get_framework_prompt(framework, mode='online')
             except (ValueError, KeyError) as e:
                 st.error(f"Error loading sample: {str(e)}")
         
@@ -314,10 +755,22 @@ def render_sidebar(framework: str) -> tuple:
         # Defaults for offline mode
         model = "gpt-4o-mini"
         temperature = 0.7
+        
+        titles = {entry["id"]: entry["title"] for entry in sample_data.list_scenarios(framework)}
+        titles.update({scenario["id"]: f"🎙️ {scenario['title']}" for scenario in get_cassette().scenarios(framework)})
+        if len(titles) > 1:
+            st.session_state.offline_scenario = st.sidebar.selectbox(
+                "Scenario",
+                list(titles),
+                format_func=titles.get,
+                help="Scenarios from the scenario pack, and online runs recorded into the cassette file."
+            )
     
     return model, temperature
 
 
+@tracing.traced()
+@telemetry.timed_render
 def render_intermediate_data(intermediate: Dict[str, Any], framework: str):
     """Render intermediate reasoning data for applicable frameworks."""
     if not intermediate:
@@ -328,24 +781,26 @@ def render_intermediate_data(intermediate: Dict[str, Any], framework: str):
         tabs = st.tabs([f"Sample {i+1}" for i in range(intermediate["num_samples"])])
         for i, tab in enumerate(tabs):
             with tab:
-                st.markdown(f'<div class="output-container output-framework">{escape_for_display(intermediate["samples"][i])}</div>', unsafe_allow_html=True)
+                render_output(intermediate["samples"][i])
     elif framework == FRAMEWORK_REFLECTION_REVISION:
         tab1, tab2, tab3 = st.tabs(["Initial Answer", "Critique", "Final Answer"])
         with tab1:
-            st.markdown(f'<div class="output-container output-framework">{escape_for_display(intermediate["initial_answer"])}</div>', unsafe_allow_html=True)
+            render_output(intermediate["initial_answer"])
         with tab2:
-            st.markdown(f'<div class="output-container output-framework">{escape_for_display(intermediate["critique"])}</div>', unsafe_allow_html=True)
+            render_output(intermediate["critique"])
         with tab3:
-            st.markdown(f'<div class="output-container output-framework">{escape_for_display(intermediate["final_answer"])}</div>', unsafe_allow_html=True)
+            render_output(intermediate["final_answer"])
 
 
-def render_offline_mode(framework: str):
-    """Render offline mode with pre-loaded sample data."""
+@tracing.traced()
+@telemetry.timed_render
+def render_offline_mode(framework: str, scenario_id: Optional[str] = None):
+    """Render offline mode with pre-loaded or recorded sample data."""
     try:
         # Get sample data
-        task = get_sample_task(framework)
-        basic_prompt = task
-        framework_prompt = get_framework_prompt(framework, mode='offline')
+        scenario = get_offline_scenario(framework, scenario_id)
+        basic_prompt = scenario["task"]
+        framework_prompt = scenario["framework_prompt"]
         
         # Display prompts
         st.markdown("---")
@@ -366,14 +821,13 @@ def render_offline_mode(framework: str):
         
         with col1:
             st.markdown("### 💬 Basic Output")
-            st.markdown(f'<div class="output-container output-basic">{escape_for_display(get_basic_output(framework))}</div>', unsafe_allow_html=True)
+            render_output(scenario["basic_output"], "output-basic")
         with col2:
             st.markdown(f"### ✨ {framework} Output")
-            st.markdown(f'<div class="output-container output-framework">{escape_for_display(get_framework_output(framework))}</div>', unsafe_allow_html=True)
+            render_output(scenario["framework_output"])
             
             # Intermediate data if applicable
-            intermediate = get_intermediate_data(framework)
-            render_intermediate_data(intermediate, framework)
+            render_intermediate_data(scenario.get("intermediate"), framework)
     except (ValueError, KeyError) as e:
         st.error(f"Error loading sample data: {str(e)}")
     except Exception as e:
@@ -382,9 +836,9 @@ def render_offline_mode(framework: str):
         st.error(f"Details: {traceback.format_exc()}")
 
 
-def render_online_mode(framework: str, model: str, temperature: float):
-    """Render online mode with editable prompts and API calls."""
-    # Display prompts
+@telemetry.timed_render
+def render_prompt_editors(framework: str):
+    """Render the editable basic and framework prompts side by side."""
     st.markdown("---")
     st.subheader("📝 Prompts")
     colp1, colp2 = st.columns(2)
@@ -403,7 +857,7 @@ def render_online_mode(framework: str, model: str, temperature: float):
         # Auto-generate framework prompt if framework prompt is empty
         if not st.session_state.framework_prompt_input and st.session_state.basic_prompt_input.strip():
             try:
-                # Use dynamic framework prompts from sample_data
+                # Build the framework prompt from the sample task
                 st.session_state.framework_prompt_input = get_framework_prompt(framework, mode='online')
             except (ValueError, KeyError):
                 # Fallback: just use the basic prompt
@@ -416,6 +870,50 @@ def render_online_mode(framework: str, model: str, temperature: float):
             label_visibility="collapsed",
             key="framework_prompt_input_widget",
         )
+
+
+def run_long_input(client, framework: Optional[str], label: str, task: str, model: str, temperature: float) -> tuple:
+    """Run a task through map-reduce, showing per-chunk progress.
+    
+    Args:
+        client: API client
+        framework: Framework whose instructions wrap each chunk, or None
+        label: Name shown in the progress bar and telemetry
+        task: Full task text
+        model: Primary model
+        temperature: Sampling temperature
+        
+    Returns:
+        Tuple of (final output, stage records)
+    """
+    progress = st.progress(0.0, text=f"{label}: running...")
+    finished = []
+    
+    def on_chunk(index: int, total: int, result):
+        finished.append(index)
+        status = "merging partial results..." if len(finished) == total and total > 1 else f"chunk {len(finished)}/{total} done ({result.latency_s:.1f}s)"
+        progress.progress(len(finished) / (total + 1 if total > 1 else total), text=f"{label}: {status}")
+    
+    output, stages = run_map_reduce(
+        client, framework, task, model, temperature,
+        chunk_chars=int(st.session_state.long_input_chunk_chars),
+        router=get_model_router() if st.session_state.multi_stage else None,
+        slo_p95_s=st.session_state.latency_slo,
+        hedge=st.session_state.hedge_requests,
+        label=label,
+        on_chunk=on_chunk
+    )
+    # Stages are the chunk calls plus one merge call, or a single call
+    chunks = max(len(stages) - 1, 1)
+    progress.progress(1.0, text=f"{label}: done in {chunks} {'chunk' if chunks == 1 else 'chunks'}")
+    return output, stages
+
+
+@tracing.traced()
+@telemetry.timed_render
+def render_online_mode(framework: str, model: str, temperature: float):
+    """Render online mode with editable prompts and API calls."""
+    render_prompt_editors(framework)
     
     # Run Demo button and results
     run_button = st.sidebar.button("🚀 Run Demo", type="primary", use_container_width=True)
@@ -433,39 +931,414 @@ def render_online_mode(framework: str, model: str, temperature: float):
         
         # Call API and display results
         try:
-            client = get_openai_client()
-            
-            with st.spinner("Running basic approach..."):
-                basic_output = call_llm(client, task, model, temperature)
+            client = get_api_client()
             
-            with st.spinner(f"Running {framework} framework..."):
-                framework_output = call_llm(client, framework_task, model, temperature)
-                intermediate = None
-            
-            # Display outputs side by side
+            # Lay out the outputs first so responses can stream into them
             st.markdown("---")
             st.subheader("📊 Outputs Comparison")
             col1, col2 = st.columns(2)
-            
             with col1:
                 st.markdown("### 💬 Basic Output")
-                st.markdown(f'<div class="output-container output-basic">{escape_for_display(basic_output)}</div>', unsafe_allow_html=True)
+                basic_renderer = OutputRenderer("output-basic")
             with col2:
                 st.markdown(f"### ✨ {framework} Output")
-                st.markdown(f'<div class="output-container output-framework">{escape_for_display(framework_output)}</div>', unsafe_allow_html=True)
+                framework_renderer = OutputRenderer("output-framework")
+            
+            stages = []
+            intermediate = None
+            if st.session_state.long_input:
+                with col1:
+                    basic_output, basic_stages = run_long_input(client, None, BASIC_LABEL, task, model, temperature)
+                basic_renderer.render(basic_output)
+                with col2:
+                    framework_output, framework_stages = run_long_input(client, framework, framework, task, model, temperature)
+                framework_renderer.render(framework_output)
+                stages = (
+                    [dict(stage, stage=f"{BASIC_LABEL} · {stage['stage']}") for stage in basic_stages]
+                    + [dict(stage, stage=f"{framework} · {stage['stage']}") for stage in framework_stages]
+                )
+                run_calls = [(stage["stage"], stage["prompt"], stage["result"]) for stage in stages]
+            else:
+                prefetched = get_prefetched(client, task, model, temperature)
+                if prefetched:
+                    basic_result, age_s = prefetched
+                    basic_renderer.render(basic_result.text)
+                    col1.caption(f"🚀 Prefetched {age_s:.0f}s ago")
+                else:
+                    with st.spinner("Running basic approach..."):
+                        basic_result = call_llm_detailed(
+                            client, task, model, temperature, on_token=basic_renderer.on_token,
+                            hedge=st.session_state.hedge_requests, framework=BASIC_LABEL
+                        )
+                        basic_renderer.finish(basic_result.text)
+                basic_output = basic_result.text
+                
+                with st.spinner(f"Running {framework} framework..."):
+                    if st.session_state.multi_stage:
+                        framework_output, intermediate, stages = run_framework_stages(
+                            client, framework, task, model, temperature,
+                            router=get_model_router(),
+                            slo_p95_s=st.session_state.latency_slo,
+                            hedge=st.session_state.hedge_requests
+                        )
+                        framework_renderer.render(framework_output)
+                        framework_calls = [(stage["stage"], stage["prompt"], stage["result"]) for stage in stages]
+                    else:
+                        prefetched = get_prefetched(client, framework_task, model, temperature)
+                        if prefetched:
+                            framework_result, age_s = prefetched
+                            framework_renderer.render(framework_result.text)
+                            col2.caption(f"🚀 Prefetched {age_s:.0f}s ago")
+                        else:
+                            framework_result = call_llm_detailed(
+                                client, framework_task, model, temperature, on_token=framework_renderer.on_token,
+                                hedge=st.session_state.hedge_requests, framework=framework
+                            )
+                            framework_renderer.finish(framework_result.text)
+                        framework_output = framework_result.text
+                        framework_calls = [(framework, framework_task, framework_result)]
+                run_calls = [(BASIC_LABEL, task, basic_result)] + framework_calls
+            
+            record_run(framework, model, temperature, run_calls)
+            if st.session_state.api_backend == BACKEND_RECORD:
+                record_scenario(framework, model, task, framework_task, basic_output, framework_output, intermediate)
+            
+            with col2:
                 render_intermediate_data(intermediate, framework)
+            
+            if stages:
+                st.markdown("### 🧭 Stage Routing")
+                st.dataframe([
+                    {
+                        "Stage": stage["stage"],
+                        "Role": stage["role"],
+                        "Model": stage["result"].model,
+                        "Latency (s)": round(stage["result"].latency_s, 2)
+                    }
+                    for stage in stages
+                ], use_container_width=True)
         except (ValueError, KeyError) as e:
             st.error(f"Validation error: {str(e)}")
+        except CassetteMiss as e:
+            st.warning(format_api_error(e))
         except Exception as e:
             st.error(f"API error: {str(e)}")
             import traceback
             st.error(f"Details: {traceback.format_exc()}")
 
 
+@tracing.traced()
+@telemetry.timed_render
+def render_compare_all_mode(model: str, temperature: float):
+    """Render compare-all mode: one basic task run through every framework concurrently."""
+    st.markdown("---")
+    st.subheader("📝 Basic Prompt")
+    st.session_state.basic_prompt_input = st.text_area(
+        label="Basic Prompt",
+        value=st.session_state.basic_prompt_input,
+        height=None,
+        label_visibility="collapsed",
+        key="compare_prompt_input_widget",
+    )
+    
+    run_button = st.sidebar.button("🚀 Run All Frameworks", type="primary", use_container_width=True)
+    if not run_button:
+        return
+    
+    task = st.session_state.basic_prompt_input
+    if not task.strip():
+        st.warning("Please enter a Basic Prompt.")
+        return
+    
+    try:
+        with tracing.span("prompt.build", frameworks=len(ALL_FRAMEWORKS)):
+            prompts = {BASIC_LABEL: task}
+            for framework in ALL_FRAMEWORKS:
+                prompts[framework] = templates.build_framework_prompt(framework, task)
+        client = get_api_client()
+    except (ValueError, KeyError) as e:
+        st.error(f"Validation error: {str(e)}")
+        return
+    
+    # Lay out one placeholder per prompt so results can fill in as they finish
+    st.markdown("---")
+    st.subheader("📊 Outputs Comparison")
+    placeholders = {}
+    labels = list(prompts)
+    for row_start in range(0, len(labels), 3):
+        columns = st.columns(3)
+        for column, label in zip(columns, labels[row_start:row_start + 3]):
+            with column:
+                icon = "💬" if label == BASIC_LABEL else "✨"
+                st.markdown(f"### {icon} {label}")
+                if label != BASIC_LABEL:
+                    with st.expander("Prompt"):
+                        st.code(prompts[label], language=None)
+                placeholders[label] = st.empty()
+                placeholders[label].info("⏳ Running...")
+    
+    hedge = st.session_state.hedge_requests
+    jobs = {
+        label: (lambda prompt=prompt, label=label: call_llm_detailed(
+            client, prompt, model, temperature, hedge=hedge, framework=label
+        ))
+        for label, prompt in prompts.items()
+    }
+    calls = []
+    started = time.perf_counter()
+    for label, result, error in run_parallel(jobs):
+        elapsed = time.perf_counter() - started
+        if error is not None:
+            placeholders[label].error(format_api_error(error))
+            continue
+        calls.append((label, prompts[label], result))
+        css_class = "output-basic" if label == BASIC_LABEL else "output-framework"
+        with placeholders[label].container():
+            st.caption(f"Finished after {elapsed:.1f}s")
+            render_output(result.text, css_class)
+    record_run("", model, temperature, calls)
+
+
+def format_result_stats(result) -> str:
+    """Format latency, TTFT, token usage and cost of an LLMResult for display."""
+    ttft = f"{result.ttft_s:.2f}s" if result.ttft_s is not None else "n/a"
+    cost = f"${result.cost_usd:.6f}" if result.cost_usd is not None else "n/a"
+    return (
+        f"⏱️ {result.latency_s:.2f}s total · TTFT {ttft} · "
+        f"{result.prompt_tokens} in / {result.completion_tokens} out tokens "
+        f"({result.cached_tokens} cached) · {cost}"
+    )
+
+
+def format_api_error(error: Exception) -> str:
+    """Describe a failed call in one line, pointing cassette misses at record mode."""
+    if isinstance(error, CassetteMiss):
+        return "📼 This prompt is not recorded. Switch **API Backend** to **Live API + Record** to capture it."
+    return f"API error: {str(error)}"
+
+
+@tracing.traced()
+@telemetry.timed_render
+def render_compare_models_mode(framework: str, models: list, temperature: float):
+    """Render multi-model mode: one framework prompt sent to several models concurrently."""
+    render_prompt_editors(framework)
+    
+    run_button = st.sidebar.button("🚀 Run on Selected Models", type="primary", use_container_width=True)
+    if not run_button:
+        return
+    
+    framework_task = st.session_state.framework_prompt_input
+    if not framework_task.strip():
+        st.warning("Please enter a Framework Prompt.")
+        return
+    if not models:
+        st.warning("Please select at least one model to compare.")
+        return
+    
+    client = get_api_client()
+    
+    st.markdown("---")
+    st.subheader(f"📊 {framework} Output by Model")
+    placeholders = {}
+    for row_start in range(0, len(models), 3):
+        columns = st.columns(3)
+        for column, model in zip(columns, models[row_start:row_start + 3]):
+            with column:
+                st.markdown(f"### 🤖 {model}")
+                placeholders[model] = st.empty()
+                placeholders[model].info("⏳ Running...")
+    summary = st.empty()
+    
+    hedge = st.session_state.hedge_requests
+    jobs = {
+        model: (lambda model=model: call_llm_detailed(
+            client, framework_task, model, temperature, hedge=hedge, framework=framework
+        ))
+        for model in models
+    }
+    rows = []
+    calls = []
+    for model, result, error in run_parallel(jobs):
+        if error is not None:
+            placeholders[model].error(format_api_error(error))
+            continue
+        calls.append((model, framework_task, result))
+        with placeholders[model].container():
+            st.caption(format_result_stats(result))
+            render_output(result.text)
+        rows.append({
+            "Model": model,
+            "Latency (s)": round(result.latency_s, 2),
+            "TTFT (s)": round(result.ttft_s, 2) if result.ttft_s is not None else None,
+            "Prompt Tokens": result.prompt_tokens,
+            "Completion Tokens": result.completion_tokens,
+            "Cached Tokens": result.cached_tokens,
+            "Cost (USD)": round(result.cost_usd, 6) if result.cost_usd is not None else None
+        })
+        summary.dataframe(sorted(rows, key=lambda row: row["Latency (s)"]), use_container_width=True)
+    record_run(framework, ", ".join(models), temperature, calls)
+
+
+def format_history_label(summary: dict) -> str:
+    """Format a run summary for the history list."""
+    started = time.strftime("%H:%M:%S", time.localtime(summary["ts"]))
+    return f"{started} · {summary['framework'] or summary['run_mode']} · {summary['title']}"
+
+
+@telemetry.timed_render
+def render_history_panel():
+    """Render the sidebar list of this session's runs for re-opening."""
+    summaries = get_run_history().summaries()
+    if not summaries:
+        return
+    labels = {summary["id"]: format_history_label(summary) for summary in summaries}
+    with st.sidebar.expander("🕘 Run History"):
+        selected = st.multiselect(
+            "Runs",
+            list(labels),
+            format_func=labels.get,
+            max_selections=3,
+            key="history_selection",
+            help="Re-open up to three previous runs side by side. No API calls are made."
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Open", disabled=not selected, use_container_width=True):
+                st.session_state.history_view = selected
+                st.rerun()
+        with col2:
+            if st.button("Close", disabled=not st.session_state.history_view, use_container_width=True):
+                st.session_state.history_view = []
+                st.rerun()
+
+
+@tracing.traced()
+@telemetry.timed_render
+def render_history_view():
+    """Render the re-opened runs side by side from the session's history."""
+    history = get_run_history()
+    records = [record for record in (history.get(run_id) for run_id in st.session_state.history_view) if record]
+    if not records:
+        return
+    
+    st.markdown("---")
+    st.subheader("🕘 Previous Runs")
+    for column, record in zip(st.columns(len(records)), records):
+        with column:
+            cost = f" · ${record['cost_usd']:.6f}" if record["cost_usd"] is not None else ""
+            st.markdown(f"**{record['framework'] or record['run_mode']}** · {record['model']} · temperature {record['temperature']}")
+            st.caption(f"{format_history_label(record)} · {record['latency_s']:.1f}s{cost}")
+            tabs = st.tabs([call["label"] for call in record["calls"]])
+            for tab, call in zip(tabs, record["calls"]):
+                with tab:
+                    st.caption(f"⏱️ {call['latency_s']:.2f}s · {call['model']} · {call['completion_tokens']} out tokens")
+                    st.code(call["prompt"], language=None)
+                    css_class = "output-basic" if call["label"] == BASIC_LABEL else "output-framework"
+                    render_output(call["output"], css_class)
+
+
+@telemetry.timed_render
+def render_trace_waterfall():
+    """Render the previous run of this session as a span waterfall."""
+    script_ctx = get_script_run_ctx()
+    spans = tracing.latest_trace(**{"session.id": script_ctx.session_id}) if script_ctx else None
+    if not spans:
+        return
+    rows = tracing.waterfall_rows(spans)
+    total_ms = max(row["offset_ms"] + row["duration_ms"] for row in rows) or 1.0
+    st.markdown(f"**Previous run** ({total_ms:.0f} ms)")
+    bars = []
+    for row in rows:
+        left = 100 * row["offset_ms"] / total_ms
+        width = max(100 * row["duration_ms"] / total_ms, 0.5)
+        color = "#e53e3e" if row["error"] else "#4a90e2"
+        # Plain html.escape: escape_for_display is itself traced and would feed spans back into the next trace
+        label = html.escape(f"{row['name']} {row['duration_ms']:.1f} ms")
+        bars.append(
+            f'<div style="font-size:0.7rem;padding-left:{row["depth"] * 0.5}rem">{label}</div>'
+            f'<div style="position:relative;height:6px;background:#edf2f7">'
+            f'<div style="position:absolute;left:{left:.2f}%;width:{width:.2f}%;height:6px;background:{color}"></div></div>'
+        )
+    st.markdown("".join(bars), unsafe_allow_html=True)
+
+
+@telemetry.timed_render
+def render_profiler_panel():
+    """Render hot functions of recent profiled reruns, with collapsed stacks for download."""
+    with st.sidebar.expander("🔥 Profiler"):
+        profiles = list(reversed(profiling.PROFILES))
+        if not profiles:
+            st.caption("The first profile appears after this rerun finishes.")
+            return
+        index = st.selectbox(
+            "Profile",
+            range(len(profiles)),
+            format_func=lambda i: f"{profiles[i].label} · {profiles[i].duration_s * 1000:.0f} ms",
+            key="profile_index"
+        )
+        profile = profiles[index]
+        st.caption(f"{profile.samples} samples over {profile.duration_s * 1000:.0f} ms")
+        st.dataframe(profile.top_functions(), use_container_width=True)
+        st.download_button(
+            "⬇️ Download Collapsed Stacks",
+            profile.collapsed(),
+            file_name="profile.collapsed.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+
+
+@telemetry.timed_render
+def render_diagnostics_panel():
+    """Render the sidebar diagnostics panel with call and render metrics."""
+    with st.sidebar.expander("📈 Diagnostics"):
+        llm_rows = telemetry.summary_rows()
+        if llm_rows:
+            st.markdown("**LLM calls**")
+            st.dataframe(llm_rows, use_container_width=True)
+        else:
+            st.caption("No LLM calls recorded yet.")
+        render_rows = telemetry.render_summary_rows()
+        if render_rows:
+            st.markdown("**Render functions**")
+            st.dataframe(render_rows, use_container_width=True)
+        if st.session_state.mode == 'online':
+            st.markdown("**Backends**")
+            st.dataframe(get_backend_router().snapshot(), use_container_width=True)
+        render_trace_waterfall()
+        st.download_button(
+            "⬇️ Download Metrics",
+            telemetry.render_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain",
+            use_container_width=True
+        )
+
+
 def main():
-    """Main Streamlit application."""
+    """Main Streamlit application, traced as one span per rerun."""
+    script_ctx = get_script_run_ctx()
+    trace_attributes = {
+        "session.id": script_ctx.session_id if script_ctx else "",
+        "run.id": uuid.uuid4().hex
+    }
+    if not profiling.is_enabled(st.query_params):
+        with tracing.span("app.rerun", trace_attributes=trace_attributes):
+            render_app()
+        return
+    
+    label = f"session {trace_attributes['session.id'][:8]} run {trace_attributes['run.id'][:8]}"
+    with profiling.profile_run(label):
+        with tracing.span("app.rerun", trace_attributes=trace_attributes):
+            render_app(profiler_enabled=True)
+
+
+@telemetry.timed_render
+def render_app(profiler_enabled: bool = False):
+    """Render the whole page for one script run."""
     setup_page_config()
     initialize_session_state()
+    start_telemetry_exporters()
     
     # Header
     st.title("🧠 AI Prompt Framework Demo")
@@ -496,12 +1369,24 @@ def main():
     
     # Render sidebar and get settings
     model, temperature = render_sidebar(framework)
+    prefetch_samples(framework, model, temperature)
+    
+    render_history_view()
     
     # Render appropriate mode
     if st.session_state.mode == 'offline':
-        render_offline_mode(framework)
+        render_offline_mode(framework, st.session_state.offline_scenario)
+    elif st.session_state.run_mode == RUN_MODE_ALL_FRAMEWORKS:
+        render_compare_all_mode(model, temperature)
+    elif st.session_state.run_mode == RUN_MODE_MULTI_MODEL:
+        render_compare_models_mode(framework, st.session_state.compare_models, temperature)
     else:
         render_online_mode(framework, model, temperature)
+    
+    render_history_panel()
+    render_diagnostics_panel()
+    if profiler_enabled:
+        render_profiler_panel()
 
 
 
@@ -0,0 +1,249 @@
+"""
+Registry of OpenAI-compatible inference backends.
+
+Each backend is an endpoint speaking the OpenAI chat completions API (the
+public API, or a self-hosted server such as vLLM on the LAN) with its own
+API key, model list, concurrency limit and timeouts. BackendRouter stands in
+for an OpenAI client and sends each request to the backend serving its
+model, so the rest of the call path is unchanged.
+
+The registry is read from the BACKENDS environment variable (inline JSON) or
+from the file named by BACKENDS_FILE (default backends.json, if present):
+
+    {"backends": [
+        {"name": "openai", "models": ["gpt-4o", "gpt-4o-mini"]},
+        {"name": "lan", "base_url": "http://10.0.0.5:8000/v1", "api_key_env": "LAN_API_KEY",
+         "models": ["llama-3.1-8b"], "max_concurrency": 8, "timeout_s": 30, "queue_timeout_s": 2}
+    ]}
+
+Without either, a single backend serves AVAILABLE_MODELS from the public
+endpoint, configured by OPENAI_API_KEY and OPENAI_BASE_URL as before. A
+model listed by several backends is served by the first one.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from openai import OpenAI
+
+from constants import (
+    AVAILABLE_MODELS,
+    BACKEND_MAX_CONCURRENCY,
+    BACKEND_QUEUE_TIMEOUT_S,
+    BACKEND_TIMEOUT_S
+)
+
+DEFAULT_BACKENDS_FILE = "backends.json"
+
+# API key sent to self-hosted servers that do not check one
+NO_API_KEY = "unused"
+
+
+class BackendBusy(RuntimeError):
+    """Every concurrency slot of a backend stayed taken for its queue timeout."""
+
+
+@dataclass
+class Backend:
+    """One OpenAI-compatible endpoint and the models it serves."""
+    name: str
+    models: List[str]
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+    max_concurrency: int = BACKEND_MAX_CONCURRENCY
+    timeout_s: float = BACKEND_TIMEOUT_S
+    queue_timeout_s: float = BACKEND_QUEUE_TIMEOUT_S
+
+
+def parse_backends(config: Dict[str, Any]) -> List[Backend]:
+    """Build backends from a registry document.
+
+    Args:
+        config: Dict with a "backends" list, see the module docstring
+
+    Returns:
+        Backends in priority order
+
+    Raises:
+        ValueError: If the document is malformed
+    """
+    entries = config.get("backends") if isinstance(config, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('backend registry needs a non-empty "backends" list')
+    backends = []
+    for i, entry in enumerate(entries):
+        name = entry.get("name") or f"backend-{i}"
+        models = entry.get("models")
+        if not isinstance(models, list) or not models or not all(isinstance(m, str) for m in models):
+            raise ValueError(f"backend {name}: models must be a non-empty list of model names")
+        base_url = entry.get("base_url")
+        api_key = entry.get("api_key")
+        if api_key is None and entry.get("api_key_env"):
+            api_key = os.environ.get(entry["api_key_env"])
+            if api_key is None:
+                raise ValueError(f"backend {name}: environment variable {entry['api_key_env']} is not set")
+        if api_key is None and base_url:
+            api_key = NO_API_KEY
+        backends.append(Backend(
+            name=name,
+            models=models,
+            base_url=base_url,
+            api_key=api_key,
+            max_concurrency=int(entry.get("max_concurrency", BACKEND_MAX_CONCURRENCY)),
+            timeout_s=float(entry.get("timeout_s", BACKEND_TIMEOUT_S)),
+            queue_timeout_s=float(entry.get("queue_timeout_s", BACKEND_QUEUE_TIMEOUT_S))
+        ))
+    return backends
+
+
+def load_backends() -> List[Backend]:
+    """Load the registry from BACKENDS or BACKENDS_FILE, or return the default backend.
+
+    Raises:
+        ValueError: If the configuration cannot be parsed
+    """
+    inline = os.environ.get("BACKENDS")
+    if inline:
+        try:
+            return parse_backends(json.loads(inline))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"BACKENDS is not valid JSON: {e}") from e
+    path = os.environ.get("BACKENDS_FILE", DEFAULT_BACKENDS_FILE)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            try:
+                return parse_backends(json.load(f))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} is not valid JSON: {e}") from e
+    elif "BACKENDS_FILE" in os.environ:
+        raise ValueError(f"Backend registry file not found: {path}")
+    return [Backend(name="openai", models=list(AVAILABLE_MODELS))]
+
+
+class _Namespace:
+    """Attribute container mimicking client.chat.completions."""
+
+    def __init__(self, **attributes: Any):
+        self.__dict__.update(attributes)
+
+
+class _LimitedStream:
+    """Iterates a backend stream and frees its concurrency slot when done."""
+
+    def __init__(self, stream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+        self._lock = threading.Lock()
+
+    def _free(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._release()
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            yield from self._stream
+        finally:
+            self._free()
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._free()
+
+
+class BackendRouter:
+    """Client sending each chat completion to the backend serving its model."""
+
+    def __init__(self, backends: List[Backend], client_factory: Callable[..., Any] = OpenAI):
+        self.backends = backends
+        self.base_url = "backends://" + "+".join(backend.name for backend in backends)
+        self._client_factory = client_factory
+        self._by_model: Dict[str, Backend] = {}
+        for backend in backends:
+            for model in backend.models:
+                self._by_model.setdefault(model, backend)
+        self._clients: Dict[str, Any] = {}
+        self._slots = {backend.name: threading.BoundedSemaphore(backend.max_concurrency) for backend in backends}
+        self._in_flight = {backend.name: 0 for backend in backends}
+        self._lock = threading.Lock()
+        self.chat = _Namespace(completions=_Namespace(create=self._create))
+
+    @property
+    def models(self) -> List[str]:
+        """Every routable model, in registry order."""
+        return list(self._by_model)
+
+    @property
+    def requires_openai_key(self) -> bool:
+        """True if some backend relies on OPENAI_API_KEY for its key."""
+        return any(backend.api_key is None for backend in self.backends)
+
+    def backend_for(self, model: str) -> Backend:
+        """Return the backend serving a model.
+
+        Raises:
+            ValueError: If no backend lists the model
+        """
+        backend = self._by_model.get(model)
+        if backend is None:
+            raise ValueError(f"No backend serves model {model}")
+        return backend
+
+    def _client(self, backend: Backend):
+        # Created on first use so an unreachable or unused backend never blocks startup
+        with self._lock:
+            if backend.name not in self._clients:
+                self._clients[backend.name] = self._client_factory(
+                    base_url=backend.base_url, api_key=backend.api_key, timeout=backend.timeout_s
+                )
+            return self._clients[backend.name]
+
+    def _release(self, backend: Backend):
+        with self._lock:
+            self._in_flight[backend.name] -= 1
+        self._slots[backend.name].release()
+
+    def _create(self, model: str, **kwargs):
+        backend = self.backend_for(model)
+        if not self._slots[backend.name].acquire(timeout=backend.queue_timeout_s):
+            raise BackendBusy(f"Backend {backend.name} has no free slot for {model} after {backend.queue_timeout_s}s")
+        with self._lock:
+            self._in_flight[backend.name] += 1
+        try:
+            response = self._client(backend).chat.completions.create(model=model, **kwargs)
+        except BaseException:
+            self._release(backend)
+            raise
+        if not kwargs.get("stream"):
+            self._release(backend)
+            return response
+        return _LimitedStream(response, lambda: self._release(backend))
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return each backend's settings and current load for display."""
+        with self._lock:
+            in_flight = dict(self._in_flight)
+        return [
+            {
+                "Backend": backend.name,
+                "Endpoint": backend.base_url or "default (OPENAI_BASE_URL)",
+                "Models": ", ".join(backend.models),
+                "Max Concurrency": backend.max_concurrency,
+                "In Flight": in_flight[backend.name],
+                "Timeout (s)": backend.timeout_s
+            }
+            for backend in self.backends
+        ]
+
+
+def is_live_client(client) -> bool:
+    """True for clients calling real endpoints, not recording or replaying."""
+    return isinstance(client, (OpenAI, BackendRouter))
@@ -0,0 +1,252 @@
+"""
+Record-and-replay backend for zero-cost presentations.
+
+A cassette is a JSON Lines file with two kinds of entries:
+
+- "interaction": one streamed chat completion, keyed by model, temperature
+  and messages, with every text delta and its offset from the request start
+- "scenario": a complete online run (task, prompts, outputs, intermediate
+  steps) that offline mode lists next to the built-in examples
+
+RecordingClient wraps a real OpenAI client and appends interactions as they
+stream. ReplayClient stands in for a client and serves recorded streams
+either instantly or at the recorded token pace, so the rest of the call path
+(stats, telemetry, tracing) runs unchanged.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from openai.types.chat import ChatCompletionChunk
+
+from singleflight import request_key
+
+REPLAY_PACE_INSTANT = "instant"
+REPLAY_PACE_RECORDED = "recorded"
+
+
+class CassetteMiss(LookupError):
+    """Raised when a replayed request has no recorded interaction."""
+
+
+def interaction_key(model: str, temperature: float, messages: List[Dict[str, str]]) -> str:
+    """Key identifying a recorded request."""
+    return request_key(model=model, temperature=temperature, messages=messages)
+
+
+def _prompt_key(messages: List[Dict[str, str]]) -> str:
+    """Looser key that ignores model and temperature, used as a fallback."""
+    return request_key(messages=messages)
+
+
+class Cassette:
+    """A cassette file, indexed in memory on first use."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._interactions: Dict[str, Dict[str, Any]] = {}
+        self._by_prompt: Dict[str, Dict[str, Any]] = {}
+        self._scenarios: List[Dict[str, Any]] = []
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._index(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+    def _index(self, entry: Dict[str, Any]):
+        if entry.get("type") == "interaction":
+            self._interactions[entry["key"]] = entry
+            self._by_prompt[_prompt_key(entry["messages"])] = entry
+        elif entry.get("type") == "scenario":
+            self._scenarios.append(entry)
+
+    def _append(self, entry: Dict[str, Any]):
+        with self._lock:
+            self._load()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index(entry)
+
+    def record_interaction(
+        self,
+        model: str,
+        temperature: float,
+        messages: List[Dict[str, str]],
+        chunks: List[List[Any]],
+        usage: Optional[Dict[str, Any]]
+    ):
+        """Store one streamed completion.
+
+        Args:
+            model: Model identifier
+            temperature: Sampling temperature
+            messages: Request messages
+            chunks: [offset_s, text] pairs in arrival order
+            usage: Usage block from the final chunk, if any
+        """
+        self._append({
+            "type": "interaction",
+            "key": interaction_key(model, temperature, messages),
+            "model": model,
+            "temperature": temperature,
+            "messages": messages,
+            "chunks": chunks,
+            "usage": usage,
+            "recorded_at": time.time()
+        })
+
+    def record_scenario(self, scenario: Dict[str, Any]):
+        """Store a complete run as an offline scenario.
+
+        Args:
+            scenario: Dict with framework, title, task, framework_prompt,
+                basic_output, framework_output and optional intermediate
+        """
+        entry = dict(scenario, type="scenario", recorded_at=time.time())
+        entry.setdefault("id", f"recorded:{time.time_ns()}")
+        self._append(entry)
+
+    def find(self, model: str, temperature: float, messages: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """Return the recorded interaction for a request, if any.
+
+        An exact match on model, temperature and messages is preferred; a
+        recording of the same messages with other settings is the fallback.
+        """
+        with self._lock:
+            self._load()
+            exact = self._interactions.get(interaction_key(model, temperature, messages))
+            return exact or self._by_prompt.get(_prompt_key(messages))
+
+    def scenarios(self, framework: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return recorded scenarios, optionally for one framework, oldest first."""
+        with self._lock:
+            self._load()
+            return [s for s in self._scenarios if framework is None or s.get("framework") == framework]
+
+
+class _Namespace:
+    """Attribute container mimicking client.chat.completions."""
+
+    def __init__(self, **attributes: Any):
+        self.__dict__.update(attributes)
+
+
+class _RecordingStream:
+    """Iterates a live stream while capturing delta timings."""
+
+    def __init__(self, stream, cassette: Cassette, request: Dict[str, Any]):
+        self._stream = stream
+        self._cassette = cassette
+        self._request = request
+
+    def __iter__(self) -> Iterator[ChatCompletionChunk]:
+        started = time.perf_counter()
+        chunks = []
+        usage = None
+        for chunk in self._stream:
+            if chunk.usage is not None:
+                usage = chunk.usage.model_dump(exclude_none=True)
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append([round(time.perf_counter() - started, 4), chunk.choices[0].delta.content])
+            yield chunk
+        self._cassette.record_interaction(
+            self._request["model"],
+            self._request.get("temperature", 1.0),
+            self._request["messages"],
+            chunks,
+            usage
+        )
+
+    def close(self):
+        self._stream.close()
+
+
+class RecordingClient:
+    """Wraps an OpenAI client and records every streamed completion."""
+
+    def __init__(self, client, cassette: Cassette):
+        # Distinct from the live client's, so a recording never attaches to a live call and records nothing
+        self.base_url = f"record+{client.base_url}"
+        self._client = client
+        self._cassette = cassette
+        self.chat = _Namespace(completions=_Namespace(create=self._create))
+
+    def _create(self, **kwargs):
+        stream = self._client.chat.completions.create(**kwargs)
+        if not kwargs.get("stream"):
+            return stream
+        return _RecordingStream(stream, self._cassette, kwargs)
+
+
+class _ReplayStream:
+    """Yields recorded deltas as chat completion chunks."""
+
+    def __init__(self, entry: Dict[str, Any], model: str, pace: str, speed: float):
+        self._entry = entry
+        self._model = model
+        self._pace = pace
+        self._speed = speed
+        self._closed = False
+
+    def _chunk(self, **fields: Any) -> ChatCompletionChunk:
+        return ChatCompletionChunk.model_validate({
+            "id": "replay",
+            "object": "chat.completion.chunk",
+            "created": int(self._entry.get("recorded_at", 0)),
+            "model": self._model,
+            **fields
+        })
+
+    def __iter__(self) -> Iterator[ChatCompletionChunk]:
+        started = time.perf_counter()
+        for offset_s, text in self._entry["chunks"]:
+            if self._closed:
+                return
+            if self._pace == REPLAY_PACE_RECORDED:
+                delay = offset_s / self._speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield self._chunk(choices=[{"index": 0, "delta": {"content": text}, "finish_reason": None}])
+        yield self._chunk(choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if self._entry.get("usage"):
+            yield self._chunk(choices=[], usage=self._entry["usage"])
+
+    def close(self):
+        self._closed = True
+
+
+class ReplayClient:
+    """Serves recorded completions in place of an OpenAI client."""
+
+    def __init__(self, cassette: Cassette, pace: str = REPLAY_PACE_INSTANT, speed: float = 1.0):
+        self.base_url = f"replay://{os.path.abspath(cassette.path)}"
+        self._cassette = cassette
+        self._pace = pace
+        self._speed = speed
+        self.chat = _Namespace(completions=_Namespace(create=self._create))
+
+    def _create(self, model: str, messages: List[Dict[str, str]], temperature: float = 1.0, stream: bool = False, **kwargs):
+        entry = self._cassette.find(model, temperature, messages)
+        if entry is None:
+            raise CassetteMiss("No recorded response for this prompt. Record it in online mode first.")
+        if not stream:
+            raise ValueError("ReplayClient only serves streamed completions")
+        return _ReplayStream(entry, model, self._pace, self._speed)
@@ -35,3 +35,137 @@ AVAILABLE_MODELS = [
 
 # Interval for checking textarea resize in milliseconds
 TEXTAREA_RESIZE_INTERVAL_MS = 100
+
+# Upper bound on concurrent API calls issued by a single fan-out run
+MAX_PARALLEL_REQUESTS = 8
+
+# Published list prices in USD per 1M tokens, used for cost estimates
+MODEL_PRICING_PER_MILLION = {
+    "gpt-5": {"input": 1.25, "cached_input": 0.125, "output": 10.00},
+    "gpt-5-mini": {"input": 0.25, "cached_input": 0.025, "output": 2.00},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50}
+}
+
+# Declared quality tiers (3 = flagship, 1 = basic) used by the model router
+MODEL_TIERS = {
+    "gpt-5": {"quality": 3},
+    "gpt-5-mini": {"quality": 2},
+    "gpt-4o": {"quality": 3},
+    "gpt-4o-mini": {"quality": 2},
+    "gpt-4-turbo": {"quality": 2},
+    "gpt-3.5-turbo": {"quality": 1}
+}
+
+# Stage roles in multi-stage framework runs
+ROLE_DRAFT = "draft"
+ROLE_CRITIQUE = "critique"
+ROLE_SAMPLE = "sample"
+ROLE_FINAL = "final"
+ROLE_MAP = "map"
+ROLE_REDUCE = "reduce"
+
+# Minimum quality tier each role needs
+ROLE_MIN_QUALITY = {
+    ROLE_DRAFT: 2,
+    ROLE_CRITIQUE: 2,
+    ROLE_SAMPLE: 1,
+    ROLE_FINAL: 3,
+    ROLE_MAP: 2,
+    ROLE_REDUCE: 3
+}
+
+# Model router tuning
+ROUTER_STATS_WINDOW = 50
+ROUTER_MIN_SAMPLES = 5
+ROUTER_ERROR_RATE_THRESHOLD = 0.5
+ROUTER_RATE_LIMIT_COOLDOWN_S = 30.0
+DEFAULT_LATENCY_SLO_P95_S = 10.0
+
+# Number of independent samples drawn for online Self-Consistency runs
+SELF_CONSISTENCY_NUM_SAMPLES = 3
+
+# Request hedging: duplicate a call whose first token is later than the
+# observed TTFT percentile, for at most HEDGE_MAX_RATE of recent requests
+HEDGE_TTFT_PERCENTILE = 90
+HEDGE_DEFAULT_DELAY_S = 5.0
+HEDGE_MAX_RATE = 0.1
+HEDGE_RATE_WINDOW = 200
+
+# Telemetry histogram buckets and export interval
+LATENCY_BUCKETS_S = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+RENDER_BUCKETS_S = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRICS_EXPORT_INTERVAL_S = 15
+
+# Tracing: service name in exported spans and traces kept for the waterfall
+TRACE_SERVICE_NAME = "prompting-demo"
+TRACE_HISTORY_SIZE = 50
+
+# On-demand profiler: sampling interval, profiles kept and hot functions shown
+PROFILE_SAMPLE_INTERVAL_S = 0.005
+PROFILE_HISTORY_SIZE = 20
+PROFILE_TOP_N = 15
+
+# Run journal: rotate at this size, fsync at most this often, batch this many
+JOURNAL_MAX_BYTES = 32 * 1024 * 1024
+JOURNAL_FLUSH_INTERVAL_S = 1.0
+JOURNAL_BATCH_SIZE = 256
+JOURNAL_QUEUE_SIZE = 10_000
+
+# Scenario pack: scenario bodies kept in memory after being read from disk
+SCENARIO_CACHE_SIZE = 32
+
+# Scenario search: BM25 parameters and number of ranked results shown
+SEARCH_BM25_K1 = 1.5
+SEARCH_BM25_B = 0.75
+SEARCH_MAX_RESULTS = 10
+
+# HTTP API: framework runs served at once per process, and how long a
+# request may wait for a free slot before it is rejected with 429
+API_MAX_CONCURRENCY = 16
+API_QUEUE_TIMEOUT_S = 2.0
+
+# Long-input mode: tasks longer than one chunk are split on paragraph
+# boundaries, processed per chunk in parallel and merged by a reduce call
+# that sees the first LONG_INPUT_HEAD_CHARS of the task as context
+LONG_INPUT_CHUNK_CHARS = 6000
+LONG_INPUT_HEAD_CHARS = 600
+
+# Output rendering: characters per output page, and the minimum time between
+# redraws of a streaming output
+OUTPUT_PAGE_CHARS = 4000
+OUTPUT_REFRESH_INTERVAL_S = 0.1
+
+# Run history: full runs kept in memory per session before spilling to disk,
+# runs listed in the history panel, and how long spilled runs are kept
+RUN_HISTORY_MEMORY_SIZE = 5
+RUN_HISTORY_LIST_SIZE = 50
+RUN_HISTORY_RETENTION_S = 7 * 24 * 3600
+
+# LLM worker: default socket, requests per minute per model across all
+# replicas and how long a request may wait for budget, the response cache,
+# and how long replicas wait on the socket before falling back in-process
+LLM_WORKER_SOCKET_PATH = "/tmp/prompting-demo-llm.sock"
+LLM_WORKER_RPM = 500
+LLM_WORKER_RATE_WAIT_S = 10.0
+LLM_WORKER_CACHE_SIZE = 256
+LLM_WORKER_CACHE_TTL_S = 600
+LLM_WORKER_CONNECT_TIMEOUT_S = 0.5
+LLM_WORKER_READ_TIMEOUT_S = 120.0
+LLM_WORKER_RETRY_S = 5.0
+
+# Prefetch: how long a prefetched sample response stays usable, the total
+# spend allowed on prefetching per process, the cap on calls to models
+# without pricing (whose spend cannot be counted), and background calls at once
+PREFETCH_TTL_S = 15 * 60
+PREFETCH_BUDGET_USD = 1.0
+PREFETCH_MAX_UNPRICED_CALLS = 50
+PREFETCH_MAX_WORKERS = 2
+
+# Inference backends: default concurrent requests per backend, per-request
+# timeout, and how long a request may wait for a free slot
+BACKEND_MAX_CONCURRENCY = 32
+BACKEND_TIMEOUT_S = 600.0
+BACKEND_QUEUE_TIMEOUT_S = 10.0
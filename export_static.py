@@ -0,0 +1,182 @@
+"""
+Static export of offline mode.
+
+Renders every framework's prompts, outputs and intermediate tabs, laid out as
+render_offline_mode shows them, into self-contained HTML pages that any
+static file host can serve with no per-request compute. Styling reuses
+CUSTOM_CSS and text goes through escape_for_display, so pages match the app.
+
+Usage:
+    python export_static.py [--out site]
+
+index.html shows each framework's default scenario behind CSS-only tabs;
+frameworks with more scenarios in the pack get one extra page per scenario.
+"""
+
+import argparse
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import sample_data
+from app import CUSTOM_CSS, escape_for_display
+from constants import ALL_FRAMEWORKS, FRAMEWORK_REFLECTION_REVISION, FRAMEWORK_SELF_CONSISTENCY
+
+# Page layout standing in for Streamlit's columns and tabs, without JavaScript
+EXPORT_CSS = """
+<style>
+body { font-family: "Source Sans Pro", sans-serif; margin: 0 auto; max-width: 1600px; padding: 1rem 2rem; color: #31333f; }
+.columns { display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; }
+.stCodeBlock pre { background: #f0f2f6; padding: 1rem; border-radius: 0.5rem; margin: 0; }
+.tabs { display: flex; flex-wrap: wrap; gap: 0 1rem; }
+.tabs > input { display: none; }
+.tabs > label { order: 1; cursor: pointer; padding: 0.5rem 0; border-bottom: 2px solid transparent; }
+.tabs > .tab-panel { order: 2; width: 100%; display: none; padding-top: 1rem; }
+.tabs > input:checked + label { border-bottom-color: #ff4b4b; color: #ff4b4b; }
+.tabs > input:checked + label + .tab-panel { display: block; }
+.more-scenarios li { font-size: 1.2rem; line-height: 1.8; }
+</style>
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+{css}
+</head>
+<body>
+<h1>🧠 AI Prompt Framework Demo</h1>
+<p>Compare how different prompting frameworks transform prompts and affect LLM outputs.</p>
+{body}
+</body>
+</html>
+"""
+
+
+def scenario_filename(scenario_id: str) -> str:
+    """Return a safe page file name for a scenario id."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "--", scenario_id) + ".html"
+
+
+def _output(text: str, css_class: str) -> str:
+    return f'<div class="output-container {css_class}">{escape_for_display(text)}</div>'
+
+
+def render_tabs(group: str, tabs: List[tuple]) -> str:
+    """Render (label, html) pairs as CSS-only tabs.
+
+    Args:
+        group: Unique name of the tab group within the page
+        tabs: (label, panel html) pairs, the first one selected
+    """
+    parts = ['<div class="tabs">']
+    for i, (label, panel) in enumerate(tabs):
+        tab_id = f"{group}-{i}"
+        checked = " checked" if i == 0 else ""
+        parts.append(
+            f'<input type="radio" name="{group}" id="{tab_id}"{checked}>'
+            f'<label for="{tab_id}">{escape_for_display(label)}</label>'
+            f'<div class="tab-panel">{panel}</div>'
+        )
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def render_intermediate_html(intermediate: Optional[Dict[str, Any]], framework: str, group: str) -> str:
+    """Render intermediate reasoning as render_intermediate_data does."""
+    if not intermediate:
+        return ""
+    if framework == FRAMEWORK_SELF_CONSISTENCY:
+        tabs = [
+            (f"Sample {i+1}", _output(intermediate["samples"][i], "output-framework"))
+            for i in range(intermediate["num_samples"])
+        ]
+    elif framework == FRAMEWORK_REFLECTION_REVISION:
+        tabs = [
+            ("Initial Answer", _output(intermediate["initial_answer"], "output-framework")),
+            ("Critique", _output(intermediate["critique"], "output-framework")),
+            ("Final Answer", _output(intermediate["final_answer"], "output-framework"))
+        ]
+    else:
+        return ""
+    return "<h3>🔍 Intermediate Reasoning</h3>" + render_tabs(group, tabs)
+
+
+def render_scenario_html(scenario: Dict[str, Any], group: str) -> str:
+    """Render one scenario's prompts and outputs as render_offline_mode does."""
+    framework = scenario["framework"]
+    return (
+        "<hr><h2>📝 Prompts</h2>"
+        '<div class="columns">'
+        f'<div><h3>📄 Basic Prompt</h3><div class="stCodeBlock"><pre><code>{escape_for_display(scenario["task"])}</code></pre></div></div>'
+        f'<div><h3>🎯 {escape_for_display(framework)} Prompt</h3><div class="stCodeBlock"><pre><code>{escape_for_display(scenario["framework_prompt"])}</code></pre></div></div>'
+        "</div>"
+        "<hr><h2>📊 Outputs Comparison</h2>"
+        '<div class="columns">'
+        f'<div><h3>💬 Basic Output</h3>{_output(scenario["basic_output"], "output-basic")}</div>'
+        f'<div><h3>✨ {escape_for_display(framework)} Output</h3>{_output(scenario["framework_output"], "output-framework")}'
+        f'{render_intermediate_html(scenario.get("intermediate"), framework, group + "-steps")}</div>'
+        "</div>"
+    )
+
+
+def render_page(title: str, body: str) -> str:
+    """Wrap a page body with the shared header and inline styles."""
+    return PAGE_TEMPLATE.format(title=escape_for_display(title), css=CUSTOM_CSS + EXPORT_CSS, body=body)
+
+
+def export_site(out_dir: str) -> List[str]:
+    """Write the static site.
+
+    Args:
+        out_dir: Output directory, created if missing
+
+    Returns:
+        Paths of the files written
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    framework_tabs = []
+    for i, framework in enumerate(ALL_FRAMEWORKS):
+        entries = sample_data.list_scenarios(framework)
+        if not entries:
+            continue
+        panel = render_scenario_html(sample_data.get_scenario(framework), f"f{i}")
+        if len(entries) > 1:
+            links = "".join(
+                f'<li><a href="{scenario_filename(entry["id"])}">{escape_for_display(entry["title"])}</a></li>'
+                for entry in entries
+            )
+            panel += f'<hr><h2>📚 More {escape_for_display(framework)} Scenarios</h2><ul class="more-scenarios">{links}</ul>'
+            for entry in entries:
+                scenario = sample_data.get_scenario(framework, entry["id"])
+                body = (
+                    f'<p><a href="index.html">← All frameworks</a></p>'
+                    f'<h2>{escape_for_display(framework)}: {escape_for_display(entry["title"])}</h2>'
+                    + render_scenario_html(scenario, "s")
+                )
+                path = os.path.join(out_dir, scenario_filename(entry["id"]))
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(render_page(f"{framework}: {entry['title']}", body))
+                written.append(path)
+        framework_tabs.append((framework, panel))
+
+    path = os.path.join(out_dir, "index.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_page("AI Prompt Framework Demo", render_tabs("framework", framework_tabs)))
+    written.append(path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export offline mode as a static HTML site.")
+    parser.add_argument("--out", default="site", help="Output directory (default: site)")
+    args = parser.parse_args()
+    written = export_site(args.out)
+    print(f"Wrote {len(written)} pages to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
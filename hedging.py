@@ -0,0 +1,204 @@
+"""
+Request hedging to cut tail latency of LLM calls.
+
+A hedged call starts one attempt and waits for its first token. If nothing
+has arrived after the hedge delay (the observed TTFT percentile for the
+model), a duplicate attempt is started and the two race; the loser is
+cancelled. A rolling cap keeps the share of hedged requests bounded so a
+slow upstream is not hit with twice the load.
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from constants import (
+    HEDGE_DEFAULT_DELAY_S,
+    HEDGE_MAX_RATE,
+    HEDGE_RATE_WINDOW,
+    HEDGE_TTFT_PERCENTILE
+)
+from model_router import MODEL_STATS
+
+
+class CallCancelled(Exception):
+    """Raised inside an attempt that lost a hedge race."""
+
+
+class HedgeStats:
+    """Counts hedged requests and how often the hedge won."""
+
+    def __init__(self, window: int = HEDGE_RATE_WINDOW):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    def try_acquire_hedge(self, max_rate: float = HEDGE_MAX_RATE) -> bool:
+        """Return whether the latest request may hedge without exceeding max_rate."""
+        with self._lock:
+            if not self._recent:
+                return False
+            allowed = (sum(self._recent) + 1) / len(self._recent) <= max_rate
+            if allowed:
+                self._recent[-1] = True
+                self.hedges_fired += 1
+            return allowed
+
+    def record_request(self):
+        """Record a hedge-eligible request."""
+        with self._lock:
+            self.requests += 1
+            self._recent.append(False)
+
+    def record_win(self):
+        """Record that the duplicate attempt beat the original."""
+        with self._lock:
+            self.hedges_won += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return counters and derived rates for display."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "hedge_rate": self.hedges_fired / self.requests if self.requests else 0.0,
+                "win_rate": self.hedges_won / self.hedges_fired if self.hedges_fired else 0.0
+            }
+
+
+# Process-wide hedging counters shared by every session
+HEDGE_STATS = HedgeStats()
+
+
+def hedge_delay(model: str) -> float:
+    """Return how long to wait for a first token before hedging.
+
+    Args:
+        model: Model identifier
+
+    Returns:
+        The rolling TTFT percentile for the model, or a default until
+        enough calls have been observed
+    """
+    observed = MODEL_STATS.ttft_percentile(model, HEDGE_TTFT_PERCENTILE)
+    return observed if observed is not None else HEDGE_DEFAULT_DELAY_S
+
+
+class CancelToken(threading.Event):
+    """Cancellation flag that can also abort a blocked attempt.
+
+    Attempts register an abort callback, such as closing their stream, so a
+    losing attempt stops even while it is still waiting for its first chunk.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks: List[Callable[[], None]] = []
+        self._callbacks_lock = threading.Lock()
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run callback when the token is set, or now if it already is."""
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def set(self):
+        with self._callbacks_lock:
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                # Aborting is best effort; the attempt still sees is_set()
+                pass
+
+
+def hedged_call(
+    attempt: Callable[[CancelToken, Callable[[str], None]], object],
+    model: str,
+    on_token: Optional[Callable[[str], None]] = None,
+    stats: HedgeStats = HEDGE_STATS
+):
+    """Run an attempt, duplicating it if the first token is late.
+
+    Without on_token the attempt that finishes first wins. With on_token the
+    output is streamed, so the attempt that produces the first token wins and
+    the other is cancelled immediately.
+
+    Attempts run on background threads, but on_token is only ever called on
+    the calling thread, with the winner's tokens, so a Streamlit script can
+    draw them as they arrive.
+
+    Args:
+        attempt: Callable taking (cancel_token, on_token) and returning the
+            result; it must raise CallCancelled once cancel_token is set
+        model: Model identifier, used to look up the hedge delay
+        on_token: Optional callback for streamed text deltas
+        stats: Counters to update
+
+    Returns:
+        The winning attempt's result
+
+    Raises:
+        Exception: The error from the last attempt if every attempt failed
+    """
+    stats.record_request()
+    events = queue.Queue()
+    cancels = [CancelToken(), CancelToken()]
+
+    def run(index: int):
+        try:
+            events.put(("done", index, attempt(cancels[index], lambda delta: events.put(("token", index, delta, None))), None))
+        except Exception as e:
+            events.put(("done", index, None, e))
+
+    def start(index: int):
+        # Copy the caller's context so attempt spans join the caller's trace
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(run, index), daemon=True).start()
+
+    start(0)
+    attempts = 1
+    # Only the first attempt's delay can trigger a hedge; after that, wait without a timeout
+    deadline = time.monotonic() + hedge_delay(model)
+    stream_owner = None
+    finished = 0
+    last_error = None
+    while finished < attempts:
+        try:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            kind, index, value, error = events.get(timeout=timeout)
+        except queue.Empty:
+            deadline = None
+            if stats.try_acquire_hedge():
+                start(1)
+                attempts = 2
+            continue
+        deadline = None
+        if kind == "token":
+            if on_token is None or cancels[index].is_set():
+                continue
+            if stream_owner is None:
+                stream_owner = index
+                cancels[1 - index].set()
+            if stream_owner == index:
+                on_token(value)
+            continue
+        finished += 1
+        if error is None:
+            cancels[1 - index].set()
+            if index == 1:
+                stats.record_win()
+            return value
+        if not isinstance(error, CallCancelled):
+            last_error = error
+    raise last_error or RuntimeError("Every hedged attempt was cancelled")
@@ -0,0 +1,652 @@
+"""
+LLM call execution for the AI Prompt Framework Demo.
+
+This module owns the OpenAI call path and the helpers for running calls
+outside the Streamlit script thread. Streamlit elements may only be updated
+from the script thread, so concurrent runs execute blocking API calls on a
+worker pool and hand results back to the caller as they complete.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    OpenAI,
+    RateLimitError
+)
+
+import prompt_templates as templates
+import telemetry
+import tracing
+from constants import (
+    FRAMEWORK_REFLECTION_REVISION,
+    FRAMEWORK_SELF_CONSISTENCY,
+    LONG_INPUT_CHUNK_CHARS,
+    LONG_INPUT_HEAD_CHARS,
+    MAX_PARALLEL_REQUESTS,
+    MODEL_PRICING_PER_MILLION,
+    ROLE_CRITIQUE,
+    ROLE_DRAFT,
+    ROLE_FINAL,
+    ROLE_MAP,
+    ROLE_REDUCE,
+    ROLE_SAMPLE,
+    SELF_CONSISTENCY_NUM_SAMPLES
+)
+from backends import BackendBusy, is_live_client
+from cassette import ReplayClient
+from hedging import CallCancelled, CancelToken, hedged_call
+from llm_worker import WorkerClient, WorkerRateLimitError, WorkerTransientError, WorkerUnavailable
+from model_router import MODEL_STATS, ModelRouter
+from singleflight import REQUEST_COALESCER, request_key
+
+# Identical concurrent requests share one API call unless disabled
+COALESCE_REQUESTS = os.environ.get("COALESCE_REQUESTS", "1").lower() not in ("0", "false", "no")
+
+# Shared LLM worker for live calls, if one is configured (see llm_worker.py)
+LLM_WORKER = WorkerClient(os.environ["LLM_WORKER_SOCKET"]) if os.environ.get("LLM_WORKER_SOCKET") else None
+
+# Errors that make it worth retrying a stage on a fallback model
+FALLBACK_ERRORS = (
+    RateLimitError, APITimeoutError, APIConnectionError, InternalServerError, WorkerTransientError, BackendBusy
+)
+
+
+@dataclass
+class LLMResult:
+    """Response text plus the timing and usage measured for one call."""
+    text: str
+    model: str
+    latency_s: float
+    ttft_s: Optional[float] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: Optional[float] = None
+    coalesced: bool = False
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """Estimate the USD cost of a call from the token counts.
+    
+    Args:
+        model: Model identifier
+        prompt_tokens: Input tokens, including cached ones
+        completion_tokens: Output tokens
+        cached_tokens: Portion of prompt_tokens served from the prompt cache
+        
+    Returns:
+        Estimated cost in USD, or None if the model has no pricing entry
+    """
+    pricing = MODEL_PRICING_PER_MILLION.get(model)
+    if pricing is None:
+        return None
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    cost = (
+        uncached * pricing["input"]
+        + cached_tokens * pricing.get("cached_input", pricing["input"])
+        + completion_tokens * pricing["output"]
+    )
+    return cost / 1_000_000
+
+
+def _stream_completion(
+    client: OpenAI,
+    prompt: str,
+    model: str,
+    temperature: float,
+    on_token: Optional[Callable[[str], None]] = None,
+    cancel_event: Optional[CancelToken] = None,
+    variant: int = 0
+) -> LLMResult:
+    """Stream one completion, recording its outcome in MODEL_STATS unless replayed.
+    
+    Live calls go through the shared LLM worker when one is configured and
+    reachable, and are made in-process otherwise. Record and replay clients
+    always run in-process.
+    
+    Raises:
+        CallCancelled: If cancel_event is set before the stream finishes
+        Exception: If OpenAI API call fails
+    """
+    with tracing.span("llm.stream", model=model) as stream_span:
+        result = None
+        if LLM_WORKER is not None and is_live_client(client):
+            try:
+                result = _consume_worker_stream(prompt, model, temperature, variant, on_token, cancel_event)
+                stream_span.set_attribute("llm.worker", True)
+            except WorkerUnavailable:
+                pass
+        if result is None:
+            result = _consume_stream(client, prompt, model, temperature, on_token, cancel_event)
+        stream_span.set_attribute("llm.ttft_s", result.ttft_s)
+        return result
+
+
+def _consume_stream(
+    client: OpenAI,
+    prompt: str,
+    model: str,
+    temperature: float,
+    on_token: Optional[Callable[[str], None]],
+    cancel_event: Optional[CancelToken]
+) -> LLMResult:
+    # Replays are instant and free: keep them out of the live models' rolling
+    # stats (router SLO checks, hedge delay) and out of the spend
+    replayed = isinstance(client, ReplayClient)
+    started = time.perf_counter()
+    parts = []
+    ttft = None
+    usage = None
+    try:
+        stream = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        if cancel_event is not None:
+            # Close the stream on cancel, so a losing attempt stops even before its first chunk
+            cancel_event.on_cancel(stream.close)
+        for chunk in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                stream.close()
+                raise CallCancelled(f"Call to {model} was cancelled")
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(delta)
+            if on_token is not None:
+                on_token(delta)
+    except CallCancelled:
+        raise
+    except Exception as e:
+        if cancel_event is not None and cancel_event.is_set():
+            # The stream was closed under us by on_cancel
+            raise CallCancelled(f"Call to {model} was cancelled") from e
+        if not replayed:
+            MODEL_STATS.record_error(model, rate_limited=isinstance(e, RateLimitError))
+        raise
+    if cancel_event is not None and cancel_event.is_set():
+        raise CallCancelled(f"Call to {model} was cancelled")
+    
+    result = LLMResult(
+        text="".join(parts),
+        model=model,
+        latency_s=time.perf_counter() - started,
+        ttft_s=ttft
+    )
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        result.prompt_tokens = usage.prompt_tokens or 0
+        result.completion_tokens = usage.completion_tokens or 0
+        result.cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        # A replay costs nothing, whatever the recorded usage
+        result.cost_usd = 0.0 if replayed else estimate_cost(
+            model, result.prompt_tokens, result.completion_tokens, result.cached_tokens
+        )
+    if not replayed:
+        MODEL_STATS.record_success(model, result.latency_s, result.ttft_s)
+    return result
+
+
+def _consume_worker_stream(
+    prompt: str,
+    model: str,
+    temperature: float,
+    variant: int,
+    on_token: Optional[Callable[[str], None]],
+    cancel_event: Optional[threading.Event]
+) -> LLMResult:
+    started = time.perf_counter()
+    parts = []
+    ttft = None
+    done = {}
+    stream = LLM_WORKER.stream(model, [{"role": "user", "content": prompt}], temperature, variant)
+    try:
+        for event in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                stream.close()
+                raise CallCancelled(f"Call to {model} was cancelled")
+            if event["type"] == "done":
+                done = event
+                break
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(event["text"])
+            if on_token is not None:
+                on_token(event["text"])
+    except (CallCancelled, WorkerUnavailable):
+        raise
+    except Exception as e:
+        MODEL_STATS.record_error(model, rate_limited=isinstance(e, WorkerRateLimitError))
+        raise
+    
+    result = LLMResult(
+        text="".join(parts),
+        model=model,
+        latency_s=time.perf_counter() - started,
+        ttft_s=ttft,
+        coalesced=bool(done.get("coalesced"))
+    )
+    usage = done.get("usage")
+    if usage:
+        result.prompt_tokens = usage.get("prompt_tokens") or 0
+        result.completion_tokens = usage.get("completion_tokens") or 0
+        result.cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        # A response served from the worker's cache costs nothing upstream
+        result.cost_usd = 0.0 if done.get("cached") else estimate_cost(
+            model, result.prompt_tokens, result.completion_tokens, result.cached_tokens
+        )
+    MODEL_STATS.record_success(model, result.latency_s, result.ttft_s)
+    return result
+
+
+def call_llm_detailed(
+    client: OpenAI,
+    prompt: str,
+    model: str,
+    temperature: float = 0.7,
+    on_token: Optional[Callable[[str], None]] = None,
+    hedge: bool = False,
+    variant: int = 0,
+    framework: str = ""
+) -> LLMResult:
+    """
+    Call the OpenAI API with streaming and measure latency, TTFT and usage.
+    
+    Args:
+        client: OpenAI client instance
+        prompt: The prompt to send
+        model: Model identifier
+        temperature: Sampling temperature
+        on_token: Optional callback invoked with each text delta as it arrives
+        hedge: Fire a duplicate request if the first token is late
+        variant: Distinguishes deliberately repeated requests, such as
+            Self-Consistency samples, so they are not coalesced together
+        framework: Framework label for telemetry
+        
+    Identical requests already in flight from any session (or, through the
+    LLM worker, any replica) are joined rather than sent again; the result
+    then has coalesced=True.
+        
+    Returns:
+        LLMResult with the response text, timings, token usage and cost
+        
+    Raises:
+        ValueError: If prompt is empty, None, or model is not specified
+        Exception: If OpenAI API call fails
+    """
+    # Input validation
+    if not prompt or not prompt.strip():
+        raise ValueError("Prompt cannot be empty")
+    
+    if not model:
+        raise ValueError("Model must be specified")
+    
+    # The LLM worker joins a duplicate attempt to the same upstream call and
+    # never cancels upstream, so hedging through it only adds load
+    hedge = hedge and not (LLM_WORKER is not None and is_live_client(client))
+    
+    def execute(handle_token: Optional[Callable[[str], None]]) -> LLMResult:
+        if not hedge:
+            return _stream_completion(client, prompt, model, temperature, handle_token, variant=variant)
+        return hedged_call(
+            lambda cancel_event, handle_attempt_token: _stream_completion(
+                client, prompt, model, temperature, handle_attempt_token, cancel_event, variant
+            ),
+            model,
+            handle_token
+        )
+    
+    with tracing.span("llm.call", model=model, framework=framework, hedge=hedge, variant=variant) as call_span:
+        started = time.perf_counter()
+        first_token_at = []
+        
+        def track_token(delta: str):
+            if not first_token_at:
+                first_token_at.append(time.perf_counter() - started)
+                call_span.add_event("first_token")
+            if on_token is not None:
+                on_token(delta)
+        
+        try:
+            if not COALESCE_REQUESTS:
+                result = execute(track_token)
+            else:
+                key = request_key(
+                    base_url=str(client.base_url),
+                    model=model,
+                    temperature=temperature,
+                    messages=[{"role": "user", "content": prompt}],
+                    variant=variant
+                )
+                result, shared = REQUEST_COALESCER.do(key, execute, track_token)
+                # Each caller gets its own copy so per-caller timings do not leak between sessions
+                result = replace(result, coalesced=shared or result.coalesced)
+        except Exception as e:
+            telemetry.record_llm_error(e, model, framework)
+            raise
+        
+        # Report timings as this caller saw them, including hedge delays and time spent attached
+        result.latency_s = time.perf_counter() - started
+        result.ttft_s = first_token_at[0] if first_token_at else result.ttft_s
+        telemetry.record_llm_call(result, framework)
+        call_span.set_attribute("llm.coalesced", result.coalesced)
+        call_span.set_attribute("llm.prompt_tokens", result.prompt_tokens)
+        call_span.set_attribute("llm.completion_tokens", result.completion_tokens)
+        return result
+
+
+def call_llm(
+    client: OpenAI,
+    prompt: str,
+    model: str,
+    temperature: float = 0.7,
+    hedge: bool = False,
+    framework: str = ""
+) -> str:
+    """
+    Call the OpenAI API with the given prompt.
+    
+    Args:
+        client: OpenAI client instance
+        prompt: The prompt to send
+        model: Model identifier
+        temperature: Sampling temperature
+        hedge: Fire a duplicate request if the first token is late
+        framework: Framework label for telemetry
+        
+    Returns:
+        The LLM response text
+        
+    Raises:
+        ValueError: If prompt is empty, None, or model is not specified
+        Exception: If OpenAI API call fails
+    """
+    return call_llm_detailed(client, prompt, model, temperature, hedge=hedge, framework=framework).text
+
+
+def call_with_fallback(
+    client: OpenAI,
+    prompt: str,
+    models: List[str],
+    temperature: float = 0.7,
+    hedge: bool = False,
+    variant: int = 0,
+    framework: str = ""
+) -> LLMResult:
+    """Call the first model in a routed chain, falling back on transient errors.
+    
+    Args:
+        client: OpenAI client instance
+        prompt: The prompt to send
+        models: Models to try in order, as returned by ModelRouter.route()
+        temperature: Sampling temperature
+        hedge: Fire a duplicate request if the first token is late
+        variant: Distinguishes deliberately repeated requests
+        framework: Framework label for telemetry
+        
+    Returns:
+        LLMResult from the first model that succeeded; result.model names it
+        
+    Raises:
+        ValueError: If no models are given
+        Exception: The last error if every model fails
+    """
+    if not models:
+        raise ValueError("At least one model must be given")
+    
+    last_error = None
+    for index, model in enumerate(models):
+        try:
+            return call_llm_detailed(
+                client, prompt, model, temperature,
+                hedge=hedge, variant=variant, framework=framework
+            )
+        except FALLBACK_ERRORS as e:
+            last_error = e
+            if index + 1 < len(models):
+                telemetry.record_retry(model, framework)
+    raise last_error
+
+
+def run_framework_stages(
+    client: OpenAI,
+    framework: str,
+    task: str,
+    model: str,
+    temperature: float = 0.7,
+    router: Optional[ModelRouter] = None,
+    slo_p95_s: Optional[float] = None,
+    hedge: bool = False
+) -> Tuple[str, Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Run a framework as separate stages, routing each stage to a model.
+    
+    Reflection & Revision runs draft, critique and revision calls.
+    Self-Consistency draws independent samples concurrently and synthesizes
+    them. Other frameworks run as a single final stage.
+    
+    Args:
+        client: OpenAI client instance
+        framework: Framework name
+        task: Basic task text
+        model: Primary model selected by the user
+        temperature: Sampling temperature
+        router: Router assigning models to stage roles
+        slo_p95_s: Optional p95 latency target in seconds
+        hedge: Fire a duplicate request if a stage's first token is late
+        
+    Returns:
+        Tuple of (final output, intermediate data shaped like
+        the intermediate field of offline scenarios, or None; per-stage records)
+    """
+    router = router or ModelRouter()
+    stages = []
+    
+    def run_stage(name: str, role: str, prompt: str, variant: int = 0) -> LLMResult:
+        with tracing.span("stage", stage=name, role=role):
+            result = call_with_fallback(client, prompt, router.route(role, model, slo_p95_s), temperature, hedge, variant, framework)
+        stages.append({"stage": name, "role": role, "prompt": prompt, "result": result})
+        return result
+    
+    if framework == FRAMEWORK_REFLECTION_REVISION:
+        initial = run_stage("Initial Answer", ROLE_DRAFT, f"{task}{templates.REFLECTION_REVISION_INITIAL}").text
+        critique = run_stage(
+            "Critique", ROLE_CRITIQUE,
+            templates.REFLECTION_REVISION_CRITIQUE.format(task=task, answer=initial)
+        ).text
+        final = run_stage(
+            "Final Answer", ROLE_FINAL,
+            templates.REFLECTION_REVISION_REVISE.format(task=task, answer=initial, critique=critique)
+        ).text
+        return final, {"initial_answer": initial, "critique": critique, "final_answer": final}, stages
+    
+    if framework == FRAMEWORK_SELF_CONSISTENCY:
+        sample_prompt = templates.build_framework_prompt(framework, task)
+        jobs = {
+            f"Sample {i + 1}": (lambda i=i: run_stage(f"Sample {i + 1}", ROLE_SAMPLE, sample_prompt, variant=i))
+            for i in range(SELF_CONSISTENCY_NUM_SAMPLES)
+        }
+        samples = {}
+        for key, result, error in run_parallel(jobs):
+            if error is not None:
+                raise error
+            samples[key] = result.text
+        ordered = [samples[key] for key in jobs]
+        numbered = "\n\n".join(f"Answer {i + 1}:\n{text}" for i, text in enumerate(ordered))
+        final = run_stage(
+            "Synthesis", ROLE_FINAL,
+            templates.SELF_CONSISTENCY_SYNTHESIS.format(num_samples=len(ordered), task=task, samples=numbered)
+        ).text
+        return final, {"samples": ordered, "num_samples": len(ordered)}, stages
+    
+    final = run_stage("Final Answer", ROLE_FINAL, templates.build_framework_prompt(framework, task)).text
+    return final, None, stages
+
+
+def split_into_chunks(text: str, max_chars: int = LONG_INPUT_CHUNK_CHARS) -> List[str]:
+    """Split text into chunks of at most max_chars, preferring paragraph breaks.
+    
+    Paragraphs are packed greedily; a paragraph longer than max_chars is split
+    on line breaks, and a line longer than max_chars is cut hard.
+    
+    Args:
+        text: Text to split
+        max_chars: Maximum chunk length in characters
+        
+    Returns:
+        Non-empty chunks in their original order
+    """
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.split("\n"):
+            pieces.extend(line[i:i + max_chars] for i in range(0, max(len(line), 1), max_chars))
+    
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    chunks.append(current)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def run_map_reduce(
+    client: OpenAI,
+    framework: Optional[str],
+    task: str,
+    model: str,
+    temperature: float = 0.7,
+    chunk_chars: int = LONG_INPUT_CHUNK_CHARS,
+    router: Optional[ModelRouter] = None,
+    slo_p95_s: Optional[float] = None,
+    hedge: bool = False,
+    label: str = "",
+    on_chunk: Optional[Callable[[int, int, LLMResult], None]] = None
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Run a long task as parallel per-chunk calls merged by a reduce call.
+    
+    Each chunk gets the framework's instructions, so latency follows the
+    chunk size rather than the total input length. A task that fits in one
+    chunk is sent as a single call.
+    
+    Args:
+        client: OpenAI client
+        framework: Framework whose instructions wrap each chunk, or None for
+            the basic prompt
+        task: Full task text
+        model: Primary model
+        temperature: Sampling temperature
+        chunk_chars: Maximum chunk length in characters
+        router: Optional router assigning models to the map and reduce roles
+        slo_p95_s: Optional p95 latency target in seconds
+        hedge: Fire a duplicate request if a call's first token is late
+        label: Telemetry label for the calls
+        on_chunk: Called on the caller's thread as (chunk index, chunk count,
+            result) whenever a chunk finishes
+        
+    Returns:
+        Tuple of (final output, per-stage records shaped like
+        run_framework_stages's)
+    """
+    stages = []
+    
+    def models_for(role: str) -> List[str]:
+        return router.route(role, model, slo_p95_s) if router else [model]
+    
+    def wrap(prompt: str) -> str:
+        return templates.build_framework_prompt(framework, prompt) if framework else prompt
+    
+    chunks = split_into_chunks(task, chunk_chars)
+    if len(chunks) <= 1:
+        prompt = wrap(task)
+        result = call_with_fallback(client, prompt, models_for(ROLE_FINAL), temperature, hedge, 0, label)
+        stages.append({"stage": "Single Call", "role": ROLE_FINAL, "prompt": prompt, "result": result})
+        if on_chunk:
+            on_chunk(0, 1, result)
+        return result.text, stages
+    
+    total = len(chunks)
+    prompts = [wrap(templates.LONG_INPUT_MAP.format(index=i + 1, total=total, chunk=chunk)) for i, chunk in enumerate(chunks)]
+    jobs = {
+        str(i): (lambda prompt=prompt: call_with_fallback(client, prompt, models_for(ROLE_MAP), temperature, hedge, 0, label))
+        for i, prompt in enumerate(prompts)
+    }
+    partials: Dict[int, LLMResult] = {}
+    with tracing.span("map", chunks=total):
+        for key, result, error in run_parallel(jobs):
+            if error is not None:
+                raise error
+            partials[int(key)] = result
+            if on_chunk:
+                on_chunk(int(key), total, result)
+    for i in range(total):
+        stages.append({"stage": f"Chunk {i + 1}/{total}", "role": ROLE_MAP, "prompt": prompts[i], "result": partials[i]})
+    
+    numbered = "\n\n".join(f"Part {i + 1}:\n{partials[i].text}" for i in range(total))
+    reduce_prompt = templates.LONG_INPUT_REDUCE.format(total=total, head=task[:LONG_INPUT_HEAD_CHARS], partials=numbered)
+    with tracing.span("reduce", chunks=total):
+        final = call_with_fallback(client, reduce_prompt, models_for(ROLE_REDUCE), temperature, hedge, 0, label)
+    stages.append({"stage": "Merge", "role": ROLE_REDUCE, "prompt": reduce_prompt, "result": final})
+    return final.text, stages
+
+
+def _run_job(key: str, job: Callable[[], Any], submitted_ns: int) -> Any:
+    """Run a pooled job as a traced child of the submitting span."""
+    tracing.record_span("queue.wait", submitted_ns, time.time_ns(), job=key)
+    with tracing.span("job", job=key):
+        return job()
+
+
+def run_parallel(
+    jobs: Dict[str, Callable[[], Any]],
+    max_workers: int = MAX_PARALLEL_REQUESTS
+) -> Iterator[Tuple[str, Any, Optional[Exception]]]:
+    """Run jobs concurrently and yield their results in completion order.
+
+    Args:
+        jobs: Mapping of job key to a zero-argument callable
+        max_workers: Upper bound on concurrently running jobs
+
+    Yields:
+        Tuples of (key, result, error). Exactly one of result/error is set;
+        a failing job does not cancel the others.
+    """
+    if not jobs:
+        return
+
+    workers = max(1, min(max_workers, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(contextvars.copy_context().run, _run_job, key, job, time.time_ns()): key
+            for key, job in jobs.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                yield key, future.result(), None
+            except Exception as e:
+                yield key, None, e
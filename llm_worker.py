@@ -0,0 +1,368 @@
+"""
+Out-of-process LLM worker shared by every app replica on a host.
+
+Several Streamlit (or API) processes behind a load balancer each hold their
+own client, so rate limits, caches and request coalescing are fragmented per
+process. The worker owns those for the whole host: one connection pool per
+backend (see backends.py), a per-model request budget, a response cache and
+single-flight coalescing of identical requests. Replicas reach it over a
+Unix socket.
+
+Protocol: the client sends one JSON line per connection,
+
+    {"op": "complete", "model": ..., "temperature": ..., "messages": [...], "variant": 0}
+
+and reads JSON lines back: {"type": "token", "text": ...} per delta, then
+{"type": "done", "usage": {...}, "cached": bool, "coalesced": bool} or
+{"type": "error", "error_type": ..., "status": ..., "message": ...}.
+{"op": "stats"} returns the worker's counters.
+
+When LLM_WORKER_SOCKET is set, llm_runner sends live calls through
+WorkerClient and falls back to calling the API in-process while the worker
+is not reachable.
+
+Usage:
+    python llm_worker.py [--socket /tmp/prompting-demo-llm.sock] [--rpm 500]
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+from backends import BackendRouter, load_backends
+from constants import (
+    LLM_WORKER_CACHE_SIZE,
+    LLM_WORKER_CACHE_TTL_S,
+    LLM_WORKER_CONNECT_TIMEOUT_S,
+    LLM_WORKER_RATE_WAIT_S,
+    LLM_WORKER_READ_TIMEOUT_S,
+    LLM_WORKER_RETRY_S,
+    LLM_WORKER_RPM,
+    LLM_WORKER_SOCKET_PATH
+)
+from singleflight import SingleFlight, request_key
+
+
+class WorkerUnavailable(ConnectionError):
+    """The worker socket could not be reached; call the API in-process."""
+
+
+class WorkerCallError(Exception):
+    """A call made through the worker failed.
+
+    Attributes:
+        error_type: Name of the exception raised in the worker
+        status: HTTP status of the failed API call, if any
+    """
+
+    def __init__(self, message: str, error_type: str = "", status: Optional[int] = None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.status = status
+
+
+class WorkerTransientError(WorkerCallError):
+    """A worker call failed in a way worth retrying: timeout, connection or 5xx."""
+
+
+class WorkerRateLimitError(WorkerTransientError):
+    """The API or the worker's request budget rejected the call."""
+
+
+class _WorkerRateLimited(Exception):
+    """The model's request budget stayed exhausted for LLM_WORKER_RATE_WAIT_S."""
+    status_code = 429
+
+
+class _TokenBucket:
+    """Request budget refilled at a fixed rate, allowing short bursts."""
+
+    def __init__(self, per_minute: float, burst_s: float = 10.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_s)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one request from the budget, waiting up to timeout seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return True
+                wait = (1.0 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class _ResponseCache:
+    """LRU cache of finished responses with a time-to-live."""
+
+    def __init__(self, size: int, ttl_s: float):
+        self.size = size
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_s:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+def _error_event(error: BaseException) -> Dict[str, Any]:
+    return {
+        "type": "error",
+        "error_type": type(error).__name__,
+        "status": getattr(error, "status_code", None),
+        "message": str(error)
+    }
+
+
+class WorkerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves completions to every replica through one shared set of backend clients."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str,
+        client: BackendRouter,
+        rpm: float = LLM_WORKER_RPM,
+        cache_size: int = LLM_WORKER_CACHE_SIZE,
+        cache_ttl_s: float = LLM_WORKER_CACHE_TTL_S
+    ):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _WorkerHandler)
+        self.client = client
+        self.rpm = rpm
+        self.cache = _ResponseCache(cache_size, cache_ttl_s)
+        self.coalescer = SingleFlight()
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "upstream_calls": 0, "cache_hits": 0, "rate_limited": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _bucket(self, model: str) -> _TokenBucket:
+        with self._lock:
+            if model not in self._buckets:
+                self._buckets[model] = _TokenBucket(self.rpm)
+            return self._buckets[model]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters for the stats op."""
+        with self._lock:
+            counters = dict(self.counters)
+        return dict(type="stats", **counters, **self.coalescer.snapshot())
+
+    def complete(self, request: Dict[str, Any], send: Callable[[Dict[str, Any]], None]):
+        """Serve one completion request, streaming events through send.
+
+        Deterministic (temperature 0) responses are cached. Identical requests
+        in flight share one upstream call, and only upstream calls draw on the
+        model's request budget.
+        """
+        self._count("requests")
+        model = request["model"]
+        temperature = request.get("temperature", 1.0)
+        messages = request["messages"]
+        key = request_key(model=model, temperature=temperature, messages=messages, variant=request.get("variant", 0))
+        cacheable = temperature == 0
+
+        cached = self.cache.get(key) if cacheable else None
+        if cached is not None:
+            self._count("cache_hits")
+            for delta in cached["deltas"]:
+                send({"type": "token", "text": delta})
+            send({"type": "done", "usage": cached["usage"], "cached": True, "coalesced": False})
+            return
+
+        def upstream(broadcast: Callable[[str], None]) -> Dict[str, Any]:
+            if not self._bucket(model).acquire(LLM_WORKER_RATE_WAIT_S):
+                self._count("rate_limited")
+                raise _WorkerRateLimited(f"Worker request budget for {model} exhausted")
+            self._count("upstream_calls")
+            deltas: List[str] = []
+            usage = None
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage.model_dump(exclude_none=True)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    deltas.append(chunk.choices[0].delta.content)
+                    broadcast(chunk.choices[0].delta.content)
+            response = {"deltas": deltas, "usage": usage}
+            if cacheable:
+                self.cache.put(key, response)
+            return response
+
+        try:
+            response, shared = self.coalescer.do(key, upstream, lambda delta: send({"type": "token", "text": delta}))
+        except Exception as e:
+            send(_error_event(e))
+            return
+        send({"type": "done", "usage": response["usage"], "cached": False, "coalesced": shared})
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Handles one request per connection."""
+
+    def handle(self):
+        disconnected = []
+
+        def send(event: Dict[str, Any]):
+            # A caller that hung up (e.g. a cancelled hedge attempt) does not
+            # abort the upstream call: attached callers and the cache still need it
+            if disconnected:
+                return
+            try:
+                self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                disconnected.append(True)
+
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            send({"type": "error", "error_type": "ValueError", "status": 400, "message": "request must be one JSON line"})
+            return
+        if request.get("op") == "stats":
+            send(self.server.stats())
+        elif request.get("op") == "complete":
+            self.server.complete(request, send)
+        else:
+            send({"type": "error", "error_type": "ValueError", "status": 400, "message": f"unknown op: {request.get('op')}"})
+
+
+def _raise_for_error(event: Dict[str, Any]):
+    """Raise the exception a worker error event stands for."""
+    message = f"{event.get('error_type')}: {event.get('message')}"
+    status = event.get("status")
+    if status == 429:
+        raise WorkerRateLimitError(message, event.get("error_type", ""), status)
+    if status is None or status >= 500:
+        raise WorkerTransientError(message, event.get("error_type", ""), status)
+    raise WorkerCallError(message, event.get("error_type", ""), status)
+
+
+class WorkerClient:
+    """Client side of the worker protocol, used by llm_runner."""
+
+    def __init__(self, socket_path: str, connect_timeout_s: float = LLM_WORKER_CONNECT_TIMEOUT_S):
+        self.socket_path = socket_path
+        self.connect_timeout_s = connect_timeout_s
+        self._down_until = 0.0
+
+    def _connect(self) -> socket.socket:
+        if time.monotonic() < self._down_until:
+            raise WorkerUnavailable(f"LLM worker at {self.socket_path} is down")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.connect_timeout_s)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            # Skip connection attempts for a while rather than paying for one per call
+            self._down_until = time.monotonic() + LLM_WORKER_RETRY_S
+            raise WorkerUnavailable(f"LLM worker at {self.socket_path} is not reachable: {e}") from e
+        sock.settimeout(LLM_WORKER_READ_TIMEOUT_S)
+        return sock
+
+    def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        variant: int = 0
+    ) -> Iterator[Dict[str, Any]]:
+        """Send a completion request and yield its token and done events.
+
+        Closing the generator closes the connection.
+
+        Raises:
+            WorkerUnavailable: If the worker cannot be reached; nothing was sent
+            WorkerCallError: If the call failed in the worker
+            WorkerTransientError: If the connection dropped or timed out mid-stream
+        """
+        sock = self._connect()
+        try:
+            payload = {"op": "complete", "model": model, "temperature": temperature, "messages": messages, "variant": variant}
+            sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+            reader = sock.makefile("r", encoding="utf-8")
+            for line in reader:
+                event = json.loads(line)
+                if event["type"] == "error":
+                    _raise_for_error(event)
+                yield event
+                if event["type"] == "done":
+                    return
+            raise WorkerTransientError("LLM worker closed the connection mid-stream")
+        except socket.timeout as e:
+            raise WorkerTransientError(f"No response from LLM worker within {LLM_WORKER_READ_TIMEOUT_S}s") from e
+        finally:
+            sock.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Fetch the worker's counters."""
+        sock = self._connect()
+        try:
+            sock.sendall(b'{"op": "stats"}\n')
+            return json.loads(sock.makefile("r", encoding="utf-8").readline())
+        finally:
+            sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve LLM calls to app replicas over a Unix socket.")
+    parser.add_argument("--socket", default=os.environ.get("LLM_WORKER_SOCKET", LLM_WORKER_SOCKET_PATH))
+    parser.add_argument("--rpm", type=float, default=float(os.environ.get("LLM_WORKER_RPM", LLM_WORKER_RPM)),
+                        help="Requests per minute per model across all replicas")
+    args = parser.parse_args()
+    server = WorkerServer(args.socket, BackendRouter(load_backends()), rpm=args.rpm)
+    print(f"LLM worker listening on {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
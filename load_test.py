@@ -0,0 +1,312 @@
+"""
+Concurrent-session load test of the Streamlit app.
+
+Simulates N user sessions following scripted flows against a stand-in LLM
+backend (stub_llm_server.py, started in-process) and reports, per session
+count:
+
+- rerun latency: widget interactions that do not call the LLM
+- run latency: Run Demo reruns, including streaming both responses
+- flow latency: one full pass through the flow
+- throughput in flows per second
+- CPU (cores busy, summed over sessions) and memory per session
+
+Flows:
+- offline: switch framework
+- online: switch framework, load sample, edit the prompts, run
+
+Each session drives the real app script with Streamlit's AppTest in its own
+process: AppTest swaps a process-wide runtime on every run, so sessions
+cannot share one process. Sessions start together once all of them have
+loaded the page; that first, cold load is not measured.
+
+Usage:
+    python load_test.py [--sessions 1,5,10] [--mode both] [--iterations 3]
+        [--ttft-ms 200] [--token-ms 10] [--words 40] [--json results.json]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from constants import ALL_FRAMEWORKS, AVAILABLE_MODELS
+from model_router import percentile
+from stub_llm_server import StubSettings, make_server
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+MODE_OFFLINE = "offline"
+MODE_ONLINE = "online"
+
+# Seconds a single rerun may take before the session counts it as failed
+RERUN_TIMEOUT_S = 120
+
+
+def _rss_mb() -> float:
+    """Resident memory of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # Peak rather than current on platforms without /proc; kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def _find(elements, label: str):
+    for element in elements:
+        if label in element.label:
+            return element
+    raise LookupError(f"No element labelled {label!r}")
+
+
+class SessionDriver:
+    """Drives one AppTest session through the scripted flows."""
+
+    def __init__(self, index: int, mode: str):
+        from streamlit.testing.v1 import AppTest
+
+        # Streamlit logs deprecation notices on every rerun
+        logging.disable(logging.WARNING)
+
+        self.index = index
+        self.mode = mode
+        self.app = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT_S)
+        self.timings: List[Dict[str, Any]] = []
+        self.errors: List[str] = []
+
+    def _step(self, name: str, action):
+        started = time.perf_counter()
+        try:
+            action()
+            failed = self.app.exception or [e for e in self.app.error]
+            if failed:
+                self.errors.append(f"{name}: {failed[0].value}")
+        except Exception as e:
+            self.errors.append(f"{name}: {type(e).__name__}: {e}")
+        self.timings.append({"step": name, "latency_s": time.perf_counter() - started})
+
+    def open(self):
+        """Load the page and switch to the session's mode (not measured)."""
+        self.app.run()
+        if self.mode == MODE_ONLINE:
+            _find(self.app.sidebar.radio, "Mode").set_value("Online (Live API)").run()
+        self.timings.clear()
+
+    def switch_framework(self, framework: str):
+        self._step("switch framework", lambda: _find(self.app.sidebar.selectbox, "Framework").set_value(framework).run())
+
+    def load_sample(self):
+        self._step("load sample", lambda: _find(self.app.sidebar.button, "Load Sample Prompt").click().run())
+
+    def edit(self, framework: str, iteration: int):
+        import prompt_templates as templates
+        import sample_data
+
+        # Unique per session and pass, so identical requests are never coalesced
+        task = f"{sample_data.get_scenario(framework)['task']}\n\nSession {self.index}, pass {iteration}: keep it brief."
+
+        def action():
+            self.app.text_area(key="basic_prompt_input_widget").input(task)
+            self.app.text_area(key="framework_prompt_input_widget").input(templates.build_framework_prompt(framework, task))
+            self.app.run()
+        self._step("edit", action)
+
+    def run_demo(self):
+        self._step("run", lambda: _find(self.app.sidebar.button, "Run Demo").click().run())
+
+    def flow(self, iteration: int) -> float:
+        """Run one pass of the session's flow and return its duration."""
+        started = time.perf_counter()
+        framework = ALL_FRAMEWORKS[(self.index + iteration + 1) % len(ALL_FRAMEWORKS)]
+        self.switch_framework(framework)
+        if self.mode == MODE_ONLINE:
+            self.load_sample()
+            self.edit(framework, iteration)
+            self.run_demo()
+        return time.perf_counter() - started
+
+
+def _session_worker(index: int, mode: str, iterations: int, barrier, results):
+    """Process entry point: open a session, wait for the others, run the flows."""
+    try:
+        driver = SessionDriver(index, mode)
+        driver.open()
+    except Exception:
+        results.put({"index": index, "fatal": traceback.format_exc()})
+        barrier.abort()
+        return
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        results.put({"index": index, "fatal": "Start was aborted: another session failed to start, or start timed out"})
+        return
+    cpu_started = time.process_time()
+    flows = [driver.flow(i) for i in range(iterations)]
+    results.put({
+        "index": index,
+        "timings": driver.timings,
+        "flows": flows,
+        "errors": driver.errors,
+        "cpu_s": time.process_time() - cpu_started,
+        "rss_mb": _rss_mb()
+    })
+
+
+def _summary(values: List[float], scale: float = 1.0) -> Dict[str, Optional[float]]:
+    return {
+        f"p{pct}": (None if not values else round(percentile(values, pct) * scale, 3))
+        for pct in (50, 95, 99)
+    }
+
+
+def _collect_reports(workers, results) -> List[Dict[str, Any]]:
+    """Gather one report per session, failing fast on a fatal report or a dead session.
+
+    Raises:
+        RuntimeError: If a session failed to start or exited without reporting
+    """
+    reports = []
+    while len(reports) < len(workers):
+        try:
+            report = results.get(timeout=1.0)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                # A report may still be in the pipe from a session that just exited
+                try:
+                    report = results.get(timeout=1.0)
+                except queue.Empty:
+                    raise RuntimeError(f"{len(workers) - len(reports)} session(s) exited without reporting") from None
+            else:
+                continue
+        if "fatal" in report:
+            raise RuntimeError(f"Session {report['index']} failed to start:\n{report['fatal']}")
+        reports.append(report)
+    return reports
+
+
+def run_level(sessions: int, mode: str, iterations: int) -> Dict[str, Any]:
+    """Run one load level: sessions concurrent sessions, iterations flows each.
+
+    Returns:
+        Report row with latency percentiles, throughput, CPU and memory
+    """
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(sessions + 1)
+    results = context.Queue()
+    workers = [
+        context.Process(target=_session_worker, args=(i, mode, iterations, barrier, results), daemon=True)
+        for i in range(sessions)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        barrier.wait(timeout=RERUN_TIMEOUT_S * 2)
+    except threading.BrokenBarrierError:
+        # Sessions report why; the first fatal report ends the level below
+        pass
+    started = time.perf_counter()
+    try:
+        reports = _collect_reports(workers, results)
+        wall_s = time.perf_counter() - started
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+    timings = [timing for report in reports for timing in report["timings"]]
+    reruns = [t["latency_s"] for t in timings if t["step"] != "run"]
+    runs = [t["latency_s"] for t in timings if t["step"] == "run"]
+    flows = [duration for report in reports for duration in report["flows"]]
+    errors = [error for report in reports for error in report["errors"]]
+    return {
+        "sessions": sessions,
+        "mode": mode,
+        "flows": len(flows),
+        "rerun_ms": _summary(reruns, 1000),
+        "run_s": _summary(runs),
+        "flow_s": _summary(flows),
+        "flows_per_s": round(len(flows) / wall_s, 3) if wall_s > 0 else None,
+        "cpu_cores": round(sum(report["cpu_s"] for report in reports) / wall_s, 2) if wall_s > 0 else None,
+        "rss_mb_per_session": round(sum(report["rss_mb"] for report in reports) / len(reports), 1),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None
+    }
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """Format report rows as a plain text table."""
+    def cell(summary: Dict[str, Optional[float]]) -> str:
+        return "/".join("-" if value is None else f"{value:g}" for value in summary.values())
+
+    header = ("sessions", "mode", "flows", "rerun ms p50/95/99", "run s p50/95/99", "flow s p50/95/99",
+              "flows/s", "cpu cores", "MB/session", "errors")
+    lines = [header] + [
+        (
+            str(row["sessions"]), row["mode"], str(row["flows"]),
+            cell(row["rerun_ms"]), cell(row["run_s"]), cell(row["flow_s"]),
+            str(row["flows_per_s"]), str(row["cpu_cores"]), str(row["rss_mb_per_session"]), str(row["errors"])
+        )
+        for row in rows
+    ]
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    text = "\n".join("  ".join(value.rjust(width) for value, width in zip(line, widths)) for line in lines)
+    first_errors = [f"{row['sessions']} {row['mode']}: {row['first_error']}" for row in rows if row["first_error"]]
+    return text + ("\n\nFirst error per level:\n" + "\n".join(first_errors) if first_errors else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the app with concurrent simulated sessions.")
+    parser.add_argument("--sessions", default="1,5,10", help="Comma-separated session counts to test")
+    parser.add_argument("--mode", choices=[MODE_OFFLINE, MODE_ONLINE, "both"], default="both")
+    parser.add_argument("--iterations", type=int, default=3, help="Flows per session at each level")
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="Stub backend time to first token")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="Stub backend delay between tokens")
+    parser.add_argument("--words", type=int, default=40, help="Words per stub response")
+    parser.add_argument("--json", help="Also write the report rows to this JSON file")
+    args = parser.parse_args()
+
+    stub = make_server("127.0.0.1", 0, StubSettings(list(AVAILABLE_MODELS), args.ttft_ms, args.token_ms, args.words, 0.0))
+    threading.Thread(target=stub.serve_forever, name="stub-llm", daemon=True).start()
+    base_url = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+
+    # Session processes inherit this environment: live calls go to the stub,
+    # and nothing is written to the journal, history store or cassette
+    scratch = tempfile.mkdtemp(prefix="load-test-")
+    os.environ.update({
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": base_url,
+        "BACKENDS": json.dumps({"backends": [{"name": "stub", "base_url": base_url, "models": list(AVAILABLE_MODELS)}]}),
+        "CASSETTE_MODE": "live",
+        "CASSETTE_PATH": os.path.join(scratch, "cassette.jsonl"),
+        "RUN_JOURNAL": "0",
+        "RUN_HISTORY_SPILL": "0"
+    })
+    for name in ("LLM_WORKER_SOCKET", "PREFETCH_SAMPLES", "METRICS_PORT", "METRICS_FILE"):
+        os.environ.pop(name, None)
+
+    modes = [MODE_OFFLINE, MODE_ONLINE] if args.mode == "both" else [args.mode]
+    rows = []
+    for mode in modes:
+        for sessions in (int(count) for count in args.sessions.split(",")):
+            print(f"Running {sessions} {mode} session(s)...", flush=True)
+            rows.append(run_level(sessions, mode, args.iterations))
+    stub.shutdown()
+
+    print()
+    print(format_report(rows))
+    print(f"\nStub backend served {stub.settings.requests} requests.")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
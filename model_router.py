@@ -0,0 +1,194 @@
+"""
+Latency- and cost-aware model routing for multi-stage frameworks.
+
+Every LLM call reports its outcome to MODEL_STATS, which keeps a rolling
+window of latencies, time-to-first-token and errors per model. ModelRouter
+combines those measurements with the declared tiers in MODEL_TIERS to pick a
+model for each stage role, together with an ordered list of fallbacks.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from constants import (
+    AVAILABLE_MODELS,
+    MODEL_PRICING_PER_MILLION,
+    MODEL_TIERS,
+    ROLE_FINAL,
+    ROLE_MIN_QUALITY,
+    ROUTER_ERROR_RATE_THRESHOLD,
+    ROUTER_MIN_SAMPLES,
+    ROUTER_RATE_LIMIT_COOLDOWN_S,
+    ROUTER_STATS_WINDOW
+)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Return the pct-th percentile (0-100) of values using nearest rank.
+
+    Args:
+        values: Sample values
+        pct: Percentile to compute
+
+    Returns:
+        The percentile value, or None if values is empty
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class ModelStats:
+    """Thread-safe rolling latency, TTFT and error statistics per model."""
+
+    def __init__(self, window: int = ROUTER_STATS_WINDOW):
+        self._window = window
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._ttfts: Dict[str, Deque[float]] = {}
+        self._outcomes: Dict[str, Deque[bool]] = {}
+        self._rate_limited_at: Dict[str, float] = {}
+
+    def _deque(self, table: Dict[str, deque], model: str) -> deque:
+        if model not in table:
+            table[model] = deque(maxlen=self._window)
+        return table[model]
+
+    def record_success(self, model: str, latency_s: float, ttft_s: Optional[float] = None):
+        """Record a completed call."""
+        with self._lock:
+            self._deque(self._latencies, model).append(latency_s)
+            if ttft_s is not None:
+                self._deque(self._ttfts, model).append(ttft_s)
+            self._deque(self._outcomes, model).append(True)
+
+    def record_error(self, model: str, rate_limited: bool = False):
+        """Record a failed call; rate-limit errors start a cooldown."""
+        with self._lock:
+            self._deque(self._outcomes, model).append(False)
+            if rate_limited:
+                self._rate_limited_at[model] = time.monotonic()
+
+    def latency_percentile(self, model: str, pct: float) -> Optional[float]:
+        """Rolling latency percentile, or None until enough samples exist."""
+        with self._lock:
+            values = list(self._latencies.get(model, ()))
+        return percentile(values, pct) if len(values) >= ROUTER_MIN_SAMPLES else None
+
+    def ttft_percentile(self, model: str, pct: float) -> Optional[float]:
+        """Rolling TTFT percentile, or None until enough samples exist."""
+        with self._lock:
+            values = list(self._ttfts.get(model, ()))
+        return percentile(values, pct) if len(values) >= ROUTER_MIN_SAMPLES else None
+
+    def error_rate(self, model: str) -> float:
+        """Fraction of failed calls in the rolling window."""
+        with self._lock:
+            outcomes = list(self._outcomes.get(model, ()))
+        if len(outcomes) < ROUTER_MIN_SAMPLES:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def is_rate_limited(self, model: str) -> bool:
+        """Whether the model is still cooling down after a rate-limit error."""
+        with self._lock:
+            limited_at = self._rate_limited_at.get(model)
+        return limited_at is not None and time.monotonic() - limited_at < ROUTER_RATE_LIMIT_COOLDOWN_S
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Summarize current statistics for display."""
+        with self._lock:
+            models = sorted(set(self._latencies) | set(self._outcomes))
+        rows = []
+        for model in models:
+            with self._lock:
+                calls = len(self._outcomes.get(model, ()))
+            rows.append({
+                "Model": model,
+                "Calls": calls,
+                "p50 (s)": self.latency_percentile(model, 50),
+                "p95 (s)": self.latency_percentile(model, 95),
+                "Error Rate": round(self.error_rate(model), 3),
+                "Rate Limited": self.is_rate_limited(model)
+            })
+        return rows
+
+
+# Process-wide statistics shared by every session
+MODEL_STATS = ModelStats()
+
+
+def _blended_price(model: str) -> float:
+    """Blended USD price per 1M tokens assuming a 1:1 input/output mix."""
+    pricing = MODEL_PRICING_PER_MILLION.get(model)
+    if pricing is None:
+        return float("inf")
+    return (pricing["input"] + pricing["output"]) / 2
+
+
+class ModelRouter:
+    """Assigns a model and fallback chain to each stage role."""
+
+    def __init__(self, stats: ModelStats = MODEL_STATS, models: Optional[List[str]] = None):
+        self.stats = stats
+        self.models = list(models or AVAILABLE_MODELS)
+
+    def _quality(self, model: str) -> int:
+        return MODEL_TIERS.get(model, {}).get("quality", 1)
+
+    def _healthy(self, model: str) -> bool:
+        return (
+            not self.stats.is_rate_limited(model)
+            and self.stats.error_rate(model) < ROUTER_ERROR_RATE_THRESHOLD
+        )
+
+    def _meets_slo(self, model: str, slo_p95_s: Optional[float]) -> bool:
+        if slo_p95_s is None:
+            return True
+        p95 = self.stats.latency_percentile(model, 95)
+        return p95 is None or p95 <= slo_p95_s
+
+    def route(self, role: str, primary: str, slo_p95_s: Optional[float] = None) -> List[str]:
+        """Return models to try for a role, best choice first.
+
+        The final answer keeps the user's primary model. Other roles take the
+        cheapest model whose quality tier is good enough for the role, never
+        exceeding the primary's tier. Models that are rate limited, erroring
+        or missing the p95 SLO are moved behind healthy ones, ordered by
+        their measured p95 so the fastest fallback is tried first.
+
+        Args:
+            role: Stage role, one of the ROLE_* constants
+            primary: Model selected by the user
+            slo_p95_s: Optional p95 latency target in seconds
+
+        Returns:
+            Ordered list of model identifiers
+        """
+        primary_quality = self._quality(primary)
+        required = min(ROLE_MIN_QUALITY.get(role, primary_quality), primary_quality)
+        eligible = [m for m in self.models if required <= self._quality(m) <= primary_quality]
+        if primary not in eligible:
+            eligible.append(primary)
+
+        if role == ROLE_FINAL:
+            preferred = [primary] + sorted((m for m in eligible if m != primary), key=self._quality, reverse=True)
+        else:
+            preferred = sorted(eligible, key=_blended_price)
+
+        # Models outside the eligible tiers are a last resort when everything eligible is degraded
+        last_resort = [m for m in self.models if m not in preferred]
+
+        good = [m for m in preferred if self._healthy(m) and self._meets_slo(m, slo_p95_s)]
+        degraded = [m for m in preferred + last_resort if m not in good]
+
+        def p95_key(model: str) -> Tuple[bool, float]:
+            p95 = self.stats.latency_percentile(model, 95)
+            return (not self._healthy(model), p95 if p95 is not None else float("inf"))
+
+        return good + sorted(degraded, key=p95_key)
@@ -0,0 +1,134 @@
+"""
+Background prefetch of responses to known prompts.
+
+The sample prompts a presenter loads are known ahead of time, so their basic
+and framework responses can be generated in the background and parked
+until Run asks for them. Entries expire after a time-to-live, and prefetching
+stops once its spend reaches a budget. Models without pricing (such as
+self-hosted ones) cannot be charged against the budget, so their calls are
+capped by count instead. A Run issued while the same prompt
+is still being prefetched attaches to that call through request coalescing
+instead of starting another.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, Dict, Optional, Tuple
+
+from constants import PREFETCH_BUDGET_USD, PREFETCH_MAX_UNPRICED_CALLS, PREFETCH_MAX_WORKERS, PREFETCH_TTL_S
+from llm_runner import LLMResult, call_llm_detailed, estimate_cost
+from singleflight import request_key
+
+
+class Prefetcher:
+    """Cache of prefetched responses, shared by every session."""
+
+    def __init__(
+        self,
+        ttl_s: float = PREFETCH_TTL_S,
+        budget_usd: float = PREFETCH_BUDGET_USD,
+        max_workers: int = PREFETCH_MAX_WORKERS,
+        max_unpriced_calls: int = PREFETCH_MAX_UNPRICED_CALLS
+    ):
+        self.ttl_s = ttl_s
+        self.budget_usd = budget_usd
+        self.max_unpriced_calls = max_unpriced_calls
+        self.spent_usd = 0.0
+        self.unpriced_calls = 0
+        self.fetched = 0
+        self.hits = 0
+        self._entries: Dict[str, Tuple[float, LLMResult]] = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+
+    @staticmethod
+    def _key(client, prompt: str, model: str, temperature: float) -> str:
+        return request_key(base_url=str(client.base_url), model=model, temperature=temperature, prompt=prompt)
+
+    def _fresh(self, key: str) -> Optional[Tuple[float, LLMResult]]:
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry[0] > self.ttl_s:
+            del self._entries[key]
+            return None
+        return entry
+
+    @property
+    def budget_exhausted(self) -> bool:
+        return self.spent_usd >= self.budget_usd
+
+    def schedule(self, client, prompt: str, model: str, temperature: float, framework: str = "") -> bool:
+        """Prefetch a response unless one is fresh, pending or over budget.
+
+        Args:
+            client: OpenAI client instance
+            prompt: Prompt to run
+            model: Model identifier
+            temperature: Sampling temperature
+            framework: Framework label for telemetry
+
+        Returns:
+            True if a background call was started
+        """
+        key = self._key(client, prompt, model, temperature)
+        priced = estimate_cost(model, 0, 0) is not None
+        with self._lock:
+            if key in self._pending or self._fresh(key) is not None or self.budget_exhausted:
+                return False
+            if not priced:
+                # Spend on unpriced models never reaches the budget; reserve a call instead
+                if self.unpriced_calls >= self.max_unpriced_calls:
+                    return False
+                self.unpriced_calls += 1
+            self._pending.add(key)
+        self._executor.submit(self._fetch, key, client, prompt, model, temperature, framework)
+        return True
+
+    def _fetch(self, key: str, client, prompt: str, model: str, temperature: float, framework: str):
+        try:
+            # Checked again here: calls queued before the budget ran out must not run
+            if self.budget_exhausted:
+                return
+            result = call_llm_detailed(client, prompt, model, temperature, framework=framework)
+        except Exception:
+            # Failures are already counted by telemetry; Run will call live
+            return
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+        with self._lock:
+            self._entries[key] = (time.time(), result)
+            self.fetched += 1
+            self.spent_usd += result.cost_usd or 0.0
+
+    def get(self, client, prompt: str, model: str, temperature: float) -> Optional[Tuple[LLMResult, float]]:
+        """Return a fresh prefetched response and its age in seconds, or None."""
+        key = self._key(client, prompt, model, temperature)
+        with self._lock:
+            entry = self._fresh(key)
+            if entry is None:
+                return None
+            self.hits += 1
+        fetched_at, result = entry
+        return replace(result), time.time() - fetched_at
+
+    def clear(self):
+        """Drop every prefetched response; pending calls still complete."""
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counters for display."""
+        with self._lock:
+            return {
+                "cached": len(self._entries),
+                "pending": len(self._pending),
+                "fetched": self.fetched,
+                "hits": self.hits,
+                "spent_usd": self.spent_usd,
+                "budget_usd": self.budget_usd,
+                "unpriced_calls": self.unpriced_calls,
+                "max_unpriced_calls": self.max_unpriced_calls
+            }
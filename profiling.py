@@ -0,0 +1,143 @@
+"""
+On-demand sampling profiler for Streamlit reruns on live instances.
+
+When enabled, a background thread samples the script thread's Python stack
+at a fixed interval while main() runs. Each rerun produces a Profile of
+collapsed stacks, kept in a bounded ring buffer, from which the hottest
+functions can be listed or a flamegraph input file downloaded.
+
+Profiling is enabled for every session with PROFILE_MODE=1, or per request
+by admins with ?profile=<token> when PROFILE_ADMIN_TOKEN is set. When it is
+off, the only cost is the is_enabled() check.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Mapping, Optional
+
+from constants import PROFILE_HISTORY_SIZE, PROFILE_SAMPLE_INTERVAL_S, PROFILE_TOP_N
+
+
+class Profile:
+    """Collapsed stack samples captured during one profiled run."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started_at = time.time()
+        self.duration_s = 0.0
+        self.stacks: Counter = Counter()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def top_functions(self, n: int = PROFILE_TOP_N) -> List[Dict[str, object]]:
+        """Return the n functions with the most self samples.
+
+        Returns:
+            Rows with the function, self and total sample share and an
+            estimate of self time in milliseconds
+        """
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+        samples = self.samples or 1
+        return [
+            {
+                "Function": frame,
+                "Self %": round(100 * count / samples, 1),
+                "Total %": round(100 * total_counts[frame] / samples, 1),
+                "Self (ms)": round(1000 * self.duration_s * count / samples, 1)
+            }
+            for frame, count in self_counts.most_common(n)
+        ]
+
+    def collapsed(self) -> str:
+        """Render stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# Most recent profiles, newest last
+PROFILES: Deque[Profile] = deque(maxlen=PROFILE_HISTORY_SIZE)
+
+
+def is_enabled(query_params: Optional[Mapping[str, str]] = None) -> bool:
+    """Return whether this run should be profiled.
+
+    Args:
+        query_params: The page's query parameters, checked for an admin token
+
+    Returns:
+        True if PROFILE_MODE is on or the profile query parameter matches
+        PROFILE_ADMIN_TOKEN
+    """
+    if os.environ.get("PROFILE_MODE", "").lower() in ("1", "true", "yes"):
+        return True
+    admin_token = os.environ.get("PROFILE_ADMIN_TOKEN")
+    if not admin_token or not query_params:
+        return False
+    supplied = query_params.get("profile")
+    return bool(supplied) and hmac.compare_digest(str(supplied), admin_token)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    if module == "__init__":
+        module = os.path.basename(os.path.dirname(code.co_filename))
+    return f"{module}:{code.co_name}"
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's stack until stopped."""
+
+    def __init__(self, target_thread_id: int, profile: Profile, interval_s: float):
+        super().__init__(name="profiler", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.profile = profile
+        self.interval_s = interval_s
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval_s):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.profile.stacks[";".join(reversed(stack))] += 1
+
+
+@contextmanager
+def profile_run(label: str, interval_s: float = PROFILE_SAMPLE_INTERVAL_S) -> Iterator[Profile]:
+    """Sample the calling thread for the duration of the block.
+
+    Args:
+        label: Description stored with the profile, e.g. session and run ids
+        interval_s: Seconds between samples
+
+    Yields:
+        The Profile being filled; it is added to PROFILES when the block exits
+    """
+    profile = Profile(label)
+    sampler = _Sampler(threading.get_ident(), profile, interval_s)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield profile
+    finally:
+        sampler.stopped.set()
+        sampler.join()
+        profile.duration_s = time.perf_counter() - started
+        PROFILES.append(profile)
@@ -5,6 +5,14 @@ This module contains the instruction templates that are appended to user tasks
 to create framework-specific prompts.
 """
 
+from constants import (
+    FRAMEWORK_CHAIN_OF_THOUGHT,
+    FRAMEWORK_TREE_OF_THOUGHT,
+    FRAMEWORK_SELF_CONSISTENCY,
+    FRAMEWORK_FEW_SHOT,
+    FRAMEWORK_REFLECTION_REVISION
+)
+
 
 # Chain of Thought template
 CHAIN_OF_THOUGHT_INSTRUCTIONS = """
@@ -80,3 +88,87 @@ Solution:"""
 # Reflection & Revision template
 REFLECTION_REVISION_INITIAL = """
 Please provide your answer to this problem."""
+
+REFLECTION_REVISION_CRITIQUE = """Here is a task and a draft answer.
+
+Task:
+{task}
+
+Draft answer:
+{answer}
+
+Critique the draft. List its strengths, then its weaknesses: missing information, vague language, unsupported claims, tone problems and structural issues. Do not rewrite the answer."""
+
+REFLECTION_REVISION_REVISE = """Here is a task, a draft answer and a critique of that draft.
+
+Task:
+{task}
+
+Draft answer:
+{answer}
+
+Critique:
+{critique}
+
+Write an improved final answer that addresses every weakness in the critique while keeping the strengths. Provide only the final answer."""
+
+
+# Self-Consistency synthesis template used after independent samples are drawn
+SELF_CONSISTENCY_SYNTHESIS = """Here is a task and {num_samples} independent answers to it.
+
+Task:
+{task}
+
+{samples}
+
+Compare the answers, identify the points they agree on and the strongest ideas from each, then write one final answer that reflects the most consistent reasoning. Provide only the final answer."""
+
+
+# Long-input (map-reduce) templates: each chunk is processed on its own, then
+# the partial results are merged
+LONG_INPUT_MAP = """The text below is part {index} of {total} of a longer input that was split to fit the model's context. Work on this part only; your partial result will be merged with the results for the other parts.
+
+{chunk}"""
+
+LONG_INPUT_REDUCE = """A long input was split into {total} parts and each part was processed separately. The input began with:
+
+{head}
+
+Here are the partial results, in order:
+
+{partials}
+
+Merge them into one complete, coherent answer to the original task. Remove repetition, reconcile contradictions and keep every important point. Provide only the final answer."""
+
+
+def build_framework_prompt(framework: str, task: str) -> str:
+    """Build the framework-enhanced prompt for an arbitrary task.
+    
+    Args:
+        framework: Framework name
+        task: Basic task text
+        
+    Returns:
+        Framework-enhanced prompt
+        
+    Raises:
+        ValueError: If framework is unknown
+    """
+    if framework == FRAMEWORK_CHAIN_OF_THOUGHT:
+        return f"{task}{CHAIN_OF_THOUGHT_INSTRUCTIONS}"
+    if framework == FRAMEWORK_TREE_OF_THOUGHT:
+        return f"{task}{TREE_OF_THOUGHT_INSTRUCTIONS}"
+    if framework == FRAMEWORK_SELF_CONSISTENCY:
+        return f"{task}{SELF_CONSISTENCY_INSTRUCTIONS}"
+    if framework == FRAMEWORK_FEW_SHOT:
+        return FEW_SHOT_EXAMPLES.format(task=task)
+    if framework == FRAMEWORK_REFLECTION_REVISION:
+        return f"""Step 1 - Initial Answer Prompt:
+{task}{REFLECTION_REVISION_INITIAL}
+
+Step 2 - Critique Prompt:
+(After receiving initial answer, critique it for weaknesses)
+
+Step 3 - Revision Prompt:
+(Based on critique, provide improved answer)"""
+    raise ValueError(f"Unknown framework: {framework}")
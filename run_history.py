@@ -0,0 +1,151 @@
+"""
+Bounded per-session history of online runs.
+
+Each session keeps its most recent runs in a small ring buffer. When a run
+falls out of the buffer it is spilled to a SQLite store shared by all
+sessions and loaded back only when it is re-opened, so server memory per
+session stays capped however many runs a session makes. Listing the history
+reads compact summaries, never full outputs.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from constants import RUN_HISTORY_LIST_SIZE, RUN_HISTORY_MEMORY_SIZE, RUN_HISTORY_RETENTION_S
+
+# Characters of the first prompt kept as a run's title
+TITLE_CHARS = 60
+
+
+def make_history_record(
+    run_mode: str,
+    framework: str,
+    model: str,
+    temperature: float,
+    calls: List[Tuple[str, str, Any]]
+) -> Dict[str, Any]:
+    """Build a history record for one online run.
+
+    Args:
+        run_mode: Run mode name
+        framework: Framework name, or "" for runs spanning frameworks
+        model: Primary model, or a comma-separated list
+        temperature: Sampling temperature
+        calls: (label, prompt, LLMResult) for every call in the run
+
+    Returns:
+        Record with a summary part and the prompts, outputs and timings
+    """
+    title = " ".join(calls[0][1].split()) if calls else ""
+    costs = [result.cost_usd for _, _, result in calls if result.cost_usd is not None]
+    return {
+        "id": uuid.uuid4().hex,
+        "ts": time.time(),
+        "run_mode": run_mode,
+        "framework": framework,
+        "model": model,
+        "temperature": temperature,
+        "title": title if len(title) <= TITLE_CHARS else title[:TITLE_CHARS - 3] + "...",
+        "latency_s": max((result.latency_s for _, _, result in calls), default=0.0),
+        "cost_usd": sum(costs) if costs else None,
+        "calls": [
+            {
+                "label": label,
+                "prompt": prompt,
+                "output": result.text,
+                "model": result.model,
+                "latency_s": result.latency_s,
+                "ttft_s": result.ttft_s,
+                "prompt_tokens": result.prompt_tokens,
+                "completion_tokens": result.completion_tokens,
+                "cost_usd": result.cost_usd
+            }
+            for label, prompt, result in calls
+        ]
+    }
+
+
+def summarize(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the compact part of a record used for listing."""
+    return {key: value for key, value in record.items() if key != "calls"}
+
+
+class HistoryStore:
+    """SQLite store of spilled runs, shared by every session."""
+
+    def __init__(self, path: str, retention_s: float = RUN_HISTORY_RETENTION_S):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "id TEXT PRIMARY KEY, session_id TEXT NOT NULL, ts REAL NOT NULL, "
+                "summary TEXT NOT NULL, calls TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS runs_session_ts ON runs (session_id, ts)")
+            self._db.execute("DELETE FROM runs WHERE ts < ?", (time.time() - retention_s,))
+
+    def put(self, session_id: str, record: Dict[str, Any]):
+        """Store a full record."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO runs (id, session_id, ts, summary, calls) VALUES (?, ?, ?, ?, ?)",
+                (record["id"], session_id, record["ts"], json.dumps(summarize(record)), json.dumps(record["calls"]))
+            )
+
+    def get(self, session_id: str, run_id: str) -> Optional[Dict[str, Any]]:
+        """Load a full record of a session, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT summary, calls FROM runs WHERE session_id = ? AND id = ?", (session_id, run_id)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(json.loads(row[0]), calls=json.loads(row[1]))
+
+    def summaries(self, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Return a session's newest summaries first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT summary FROM runs WHERE session_id = ? ORDER BY ts DESC LIMIT ?", (session_id, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class RunHistory:
+    """One session's runs: the newest in memory, older ones in the store."""
+
+    def __init__(self, session_id: str, store: Optional[HistoryStore], capacity: int = RUN_HISTORY_MEMORY_SIZE):
+        self.session_id = session_id
+        self.store = store
+        self.capacity = capacity
+        self._recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, record: Dict[str, Any]):
+        """Add a run, spilling the oldest in-memory run if over capacity.
+
+        Without a store, runs falling out of memory are dropped.
+        """
+        self._recent[record["id"]] = record
+        while len(self._recent) > self.capacity:
+            _, spilled = self._recent.popitem(last=False)
+            if self.store is not None:
+                self.store.put(self.session_id, spilled)
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Return a full run from memory or the store."""
+        if run_id in self._recent:
+            return self._recent[run_id]
+        return self.store.get(self.session_id, run_id) if self.store is not None else None
+
+    def summaries(self, limit: int = RUN_HISTORY_LIST_SIZE) -> List[Dict[str, Any]]:
+        """Return summaries of the newest runs, newest first."""
+        recent = [summarize(record) for record in reversed(self._recent.values())]
+        spilled = self.store.summaries(self.session_id, max(limit - len(recent), 0)) if self.store is not None else []
+        return (recent + spilled)[:limit]
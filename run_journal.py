@@ -0,0 +1,273 @@
+"""
+Append-only journal of online runs with batched background writes.
+
+Records are queued by the UI thread and written as JSON lines by a single
+writer thread, which batches them, fsyncs at most every flush interval and
+rotates the file into a gzip-compressed segment once it grows past a size
+limit. iter_records() streams every record back, oldest first, across the
+rotated segments and the live file.
+
+Several processes (Streamlit replicas and the API server) may share one
+journal. Writers hold a shared lock on a sidecar .lock file while appending
+and reopen the path when it no longer names their file; rotation takes the
+lock exclusively, so no record lands in a segment after it is renamed.
+"""
+
+import atexit
+import contextlib
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks (Windows): only one process may write a journal
+    fcntl = None
+
+from constants import (
+    JOURNAL_BATCH_SIZE,
+    JOURNAL_FLUSH_INTERVAL_S,
+    JOURNAL_MAX_BYTES,
+    JOURNAL_QUEUE_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class RunJournal:
+    """Journal writer owning one background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = JOURNAL_MAX_BYTES,
+        flush_interval_s: float = JOURNAL_FLUSH_INTERVAL_S,
+        batch_size: int = JOURNAL_BATCH_SIZE,
+        queue_size: int = JOURNAL_QUEUE_SIZE
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+        self._lock_file = None
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="run-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """Queue a record without blocking.
+
+        Args:
+            record: JSON-serializable record
+
+        Returns:
+            False if the queue was full and the record was dropped
+        """
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0):
+        """Flush pending records and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        f = None
+        last_sync = time.monotonic()
+        dirty = False
+        stopping = False
+        try:
+            while not stopping:
+                batch = self._next_batch(self.flush_interval_s)
+                if batch and batch[-1] is _STOP:
+                    batch.pop()
+                    stopping = True
+                unwritten = len(batch)
+                try:
+                    if batch:
+                        with self._locked(fcntl.LOCK_SH if fcntl else 0):
+                            f = self._reopen_if_rotated(f)
+                            f.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch))
+                            # Flushed under the lock so a concurrent rotation sees the whole batch
+                            f.flush()
+                        unwritten = 0
+                        self.written += len(batch)
+                        dirty = True
+                    now = time.monotonic()
+                    if f is not None and dirty and (stopping or now - last_sync >= self.flush_interval_s):
+                        os.fsync(f.fileno())
+                        last_sync = now
+                        dirty = False
+                    if f is not None and f.tell() >= self.max_bytes:
+                        f = self._rotate(f)
+                except Exception as e:
+                    # Keep the writer alive; the file is reopened for the next batch
+                    self.write_errors += 1
+                    self.dropped += unwritten
+                    logger.warning("Run journal %s: write failed, %d records dropped: %s", self.path, unwritten, e)
+                    f = _close_quietly(f)
+        finally:
+            _close_quietly(f)
+            _close_quietly(self._lock_file)
+
+    @contextlib.contextmanager
+    def _locked(self, mode: int):
+        """Hold the journal's cross-process lock in the given flock mode."""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            self._lock_file = open(f"{self.path}.lock", "a")
+        fcntl.flock(self._lock_file.fileno(), mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self, f):
+        """Return f if it is still the file at self.path, else open the path anew."""
+        if f is not None:
+            try:
+                current = os.stat(self.path)
+                opened = os.fstat(f.fileno())
+                if (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+        return open(self.path, "a", encoding="utf-8")
+
+    def _next_batch(self, timeout: float) -> List[Any]:
+        """Block for the first record, then take whatever else is queued."""
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _rotate(self, f):
+        """Move the live file aside and compress it into a numbered segment.
+
+        Returns:
+            None, so the next batch reopens the path; or f if another
+            process already rotated the file
+        """
+        with self._locked(fcntl.LOCK_EX if fcntl else 0):
+            f = self._reopen_if_rotated(f)
+            if os.fstat(f.fileno()).st_size < self.max_bytes:
+                return f
+            f.close()
+            # Zero-padded nanosecond timestamps sort lexically in rotation order
+            segment = f"{self.path}.{time.time_ns():020d}"
+            os.replace(self.path, segment)
+        with open(segment, "rb") as src, gzip.open(f"{segment}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(segment)
+        return None
+
+
+def _close_quietly(f):
+    """Close a file, ignoring errors, and return None."""
+    if f is not None:
+        try:
+            f.close()
+        except OSError:
+            pass
+    return None
+
+
+def segment_paths(path: str) -> List[str]:
+    """Return rotated segments (oldest first) followed by the live file."""
+    segments = sorted(glob.glob(glob.escape(path) + ".*.gz"))
+    return segments + ([path] if os.path.exists(path) else [])
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream journal records, oldest first, across rotated segments.
+
+    Args:
+        path: Path of the live journal file
+
+    Yields:
+        One dict per record; a truncated last line is skipped
+    """
+    for segment in segment_paths(path):
+        opener = gzip.open if segment.endswith(".gz") else open
+        with opener(segment, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def make_run_record(
+    run_mode: str,
+    framework: str,
+    model: str,
+    temperature: float,
+    calls: List[Tuple[str, str, Any]],
+    **extra: Any
+) -> Dict[str, Any]:
+    """Build a journal record for one online run.
+
+    Args:
+        run_mode: Run mode name
+        framework: Framework name, or "" for runs spanning frameworks
+        model: Primary model
+        temperature: Sampling temperature
+        calls: (label, prompt, LLMResult) for every call in the run
+        **extra: Additional fields such as session or trace ids
+
+    Returns:
+        JSON-serializable record
+    """
+    record = {
+        "type": "run",
+        "ts": time.time(),
+        "run_mode": run_mode,
+        "framework": framework,
+        "model": model,
+        "temperature": temperature,
+        "calls": [dict(label=label, prompt=prompt, **asdict(result)) for label, prompt, result in calls]
+    }
+    record.update(extra)
+    return record
+
+
+def open_journal_from_env() -> Optional[RunJournal]:
+    """Create the journal configured by RUN_JOURNAL_PATH, unless RUN_JOURNAL=0."""
+    if os.environ.get("RUN_JOURNAL", "1").lower() in ("0", "false", "no"):
+        return None
+    return RunJournal(os.environ.get("RUN_JOURNAL_PATH", os.path.join("runs", "journal.jsonl")))
@@ -0,0 +1,199 @@
+"""
+Indexed on-disk pack of offline scenarios.
+
+A pack is a JSON Lines file with one scenario per line and a sidecar index
+(<pack>.index.json) holding each scenario's metadata and the byte offset and
+length of its line. Opening a pack reads only the index, so startup time and
+memory stay flat as the catalog grows; a scenario body is read with a single
+seek when it is first shown and kept in a small LRU cache.
+
+Scenario fields: id, framework, title, industry, task, framework_prompt,
+basic_output, framework_output and an optional intermediate dict. Adding a
+scenario is appending a line to the pack; a stale or missing index is rebuilt
+on open, or explicitly with `python scenario_pack.py <pack.jsonl>`.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from constants import SCENARIO_CACHE_SIZE
+
+INDEX_VERSION = 3
+
+# Fields copied into the index; everything else is loaded on demand
+METADATA_FIELDS = ("id", "framework", "title", "industry")
+
+
+def index_path(path: str) -> str:
+    """Return the sidecar index path for a pack file."""
+    return os.path.splitext(path)[0] + ".index.json"
+
+
+def scan_pack(path: str) -> Dict[str, Any]:
+    """Scan a pack file and return its index without writing it.
+
+    Args:
+        path: Path of the pack file
+
+    Returns:
+        Index dict with version, the pack's size and SHA-256, and one entry per
+        scenario
+
+    Raises:
+        ValueError: If a line is not valid JSON or a scenario id repeats
+    """
+    entries = []
+    seen = set()
+    offset = 0
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for line_number, line in enumerate(f, start=1):
+            digest.update(line)
+            length = len(line)
+            if line.strip():
+                try:
+                    scenario = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid scenario: {e}") from e
+                if scenario["id"] in seen:
+                    raise ValueError(f"{path}:{line_number}: duplicate scenario id {scenario['id']}")
+                seen.add(scenario["id"])
+                entry = {field: scenario.get(field, "") for field in METADATA_FIELDS}
+                entry.update(offset=offset, length=length)
+                entries.append(entry)
+            offset += length
+
+    return {
+        "version": INDEX_VERSION,
+        "pack_size": offset,
+        "pack_sha256": digest.hexdigest(),
+        "entries": entries
+    }
+
+
+def hash_pack(path: str) -> str:
+    """Return the SHA-256 of a pack file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_index(path: str, index: Dict[str, Any]):
+    tmp_path = index_path(path) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    os.replace(tmp_path, index_path(path))
+
+
+def build_index(path: str) -> Dict[str, Any]:
+    """Scan a pack file and write its sidecar index.
+
+    Returns:
+        The index that was written
+    """
+    index = scan_pack(path)
+    _write_index(path, index)
+    return index
+
+
+def write_pack(path: str, scenarios: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write scenarios to a new pack file and index it.
+
+    Returns:
+        The index that was written
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for scenario in scenarios:
+            f.write(json.dumps(scenario, ensure_ascii=False) + "\n")
+    return build_index(path)
+
+
+class ScenarioPack:
+    """Read access to a pack: metadata up front, bodies on demand."""
+
+    def __init__(self, path: str, cache_size: int = SCENARIO_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._entries = self._load_index()
+        self._by_id = {entry["id"]: entry for entry in self._entries}
+
+    def _load_index(self) -> List[Dict[str, Any]]:
+        try:
+            with open(index_path(self.path), encoding="utf-8") as f:
+                index = json.load(f)
+            # Checked by contents, not mtime: the index is committed next to
+            # the pack, and a clone, checkout or touch must not rewrite it
+            if (
+                index.get("version") == INDEX_VERSION
+                and index.get("pack_size") == os.path.getsize(self.path)
+                and index.get("pack_sha256") == hash_pack(self.path)
+            ):
+                return index["entries"]
+        except (OSError, ValueError):
+            pass
+        # Missing, stale or unreadable index: rebuild it, in memory if the
+        # pack directory is read-only
+        try:
+            return build_index(self.path)["entries"]
+        except OSError:
+            return scan_pack(self.path)["entries"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def list(self, framework: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return scenario metadata in pack order, optionally for one framework."""
+        return [entry for entry in self._entries if framework is None or entry["framework"] == framework]
+
+    def metadata(self, scenario_id: str) -> Dict[str, Any]:
+        """Return the index entry of a scenario.
+
+        Raises:
+            KeyError: If the pack has no scenario with this id
+        """
+        return self._by_id[scenario_id]
+
+    def iter_scenarios(self) -> Iterator[Dict[str, Any]]:
+        """Stream every full scenario in pack order, bypassing the cache."""
+        with open(self.path, "rb") as f:
+            for entry in self._entries:
+                f.seek(entry["offset"])
+                yield json.loads(f.read(entry["length"]))
+
+    def get(self, scenario_id: str) -> Dict[str, Any]:
+        """Load a full scenario by id.
+
+        Raises:
+            KeyError: If the pack has no scenario with this id
+        """
+        with self._lock:
+            if scenario_id in self._cache:
+                self._cache.move_to_end(scenario_id)
+                return self._cache[scenario_id]
+
+        entry = self._by_id[scenario_id]
+        with open(self.path, "rb") as f:
+            f.seek(entry["offset"])
+            scenario = json.loads(f.read(entry["length"]))
+
+        with self._lock:
+            self._cache[scenario_id] = scenario
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return scenario
+
+
+if __name__ == "__main__":
+    for pack_path in sys.argv[1:]:
+        built = build_index(pack_path)
+        print(f"{pack_path}: indexed {len(built['entries'])} scenarios")
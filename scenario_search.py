@@ -0,0 +1,103 @@
+"""
+Full-text search over the scenario catalog.
+
+An inverted index with BM25 ranking is built once over each scenario's
+title, task and outputs. Queries only touch the postings of their own terms,
+so ranked results come back in milliseconds over thousands of scenarios.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from constants import SEARCH_BM25_B, SEARCH_BM25_K1, SEARCH_MAX_RESULTS
+
+# Scenario fields included in the index
+SEARCH_FIELDS = ("title", "industry", "task", "basic_output", "framework_output")
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i if in into is it its of on or our so
+that the their them then there these they this to was we were what when which will with
+you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into indexable terms, dropping stopwords."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index of documents ranked with Okapi BM25."""
+
+    def __init__(self, k1: float = SEARCH_BM25_K1, b: float = SEARCH_BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, doc_id: str, text: str):
+        """Index one document.
+
+        Args:
+            doc_id: Identifier returned by search()
+            text: Document text
+        """
+        terms = tokenize(text)
+        doc = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(len(terms))
+        self._total_length += len(terms)
+        for term, frequency in Counter(terms).items():
+            self.postings.setdefault(term, []).append((doc, frequency))
+
+    def search(self, query: str, limit: int = SEARCH_MAX_RESULTS) -> List[Tuple[str, float]]:
+        """Rank documents against a query.
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of results
+
+        Returns:
+            (doc_id, score) pairs, best first; documents sharing no term
+            with the query are omitted
+        """
+        if not self.doc_ids:
+            return []
+        doc_count = len(self.doc_ids)
+        average_length = self._total_length / doc_count or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, frequency in postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc] / average_length
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.doc_ids[doc], score) for doc, score in best]
+
+
+def build_scenario_index(scenarios: Iterable[Dict[str, object]]) -> BM25Index:
+    """Index scenarios by their searchable fields.
+
+    Args:
+        scenarios: Full scenario dicts, e.g. ScenarioPack.iter_scenarios()
+
+    Returns:
+        Index whose document ids are scenario ids
+    """
+    index = BM25Index()
+    for scenario in scenarios:
+        index.add(scenario["id"], "\n".join(str(scenario.get(field) or "") for field in SEARCH_FIELDS))
+    return index
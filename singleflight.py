@@ -0,0 +1,168 @@
+"""
+Single-flight coalescing of identical concurrent LLM requests.
+
+When many sessions send the same request at the same time (for example a
+workshop room clicking "Load Sample Prompt" then Run), only the first caller
+issues the API call. Callers arriving while it is in flight attach to it:
+they replay the tokens streamed so far, follow the rest of the stream, and
+receive the same result. Upstream load then scales with distinct requests
+rather than with the number of sessions.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def request_key(**fields: Any) -> str:
+    """Build a stable key from the fields that determine a response.
+
+    Args:
+        **fields: JSON-serializable request fields, e.g. model, temperature
+            and messages
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """State of one in-flight request shared by its leader and followers."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.tokens: List[str] = []
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[Callable[[str], None]], Any],
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Tuple[Any, bool]:
+        """Run fn once per key among concurrent callers.
+
+        Args:
+            key: Request key, see request_key()
+            fn: Callable taking a token callback and returning the result
+            on_token: Optional callback for this caller's streamed deltas
+
+        Returns:
+            Tuple of (result, shared) where shared is True if this caller
+            attached to another caller's request
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every attached caller.
+                An exception from the leader's own on_token is raised in the
+                leader only, after fn completes for the callers attached to it.
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+
+        if leader:
+            return self._lead(key, flight, fn, on_token), False
+        return self._follow(flight, on_token), True
+
+    def _lead(self, key: str, flight: _Flight, fn, on_token):
+        interrupted: List[BaseException] = []
+
+        def broadcast(delta: str):
+            with flight.cond:
+                flight.tokens.append(delta)
+                flight.cond.notify_all()
+            if on_token is None or interrupted:
+                return
+            try:
+                on_token(delta)
+            except BaseException as e:
+                # The leader's own callback failed or, in Streamlit, its session
+                # reran or stopped. Keep the call going for any followers and
+                # raise in the leader alone once it completes.
+                interrupted.append(e)
+                with self._lock:
+                    abandon = flight.followers == 0 and self._flights.get(key) is flight
+                    if abandon:
+                        del self._flights[key]
+                if abandon:
+                    raise
+
+        try:
+            flight.result = fn(broadcast)
+        except Exception as e:
+            flight.error = e
+            raise
+        except BaseException:
+            # Never hand a script-control or interpreter exception to other callers
+            flight.error = RuntimeError("The shared request was interrupted")
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+        if interrupted:
+            raise interrupted[0]
+        return flight.result
+
+    def _follow(self, flight: _Flight, on_token):
+        seen = 0
+        with flight.cond:
+            while True:
+                pending = flight.tokens[seen:]
+                seen += len(pending)
+                done = flight.done
+                if pending and on_token is not None:
+                    # Deliver outside the lock so a slow consumer never stalls the leader
+                    flight.cond.release()
+                    try:
+                        for delta in pending:
+                            on_token(delta)
+                    finally:
+                        flight.cond.acquire()
+                    continue
+                if done:
+                    break
+                flight.cond.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def in_flight(self) -> int:
+        """Number of distinct requests currently pending."""
+        with self._lock:
+            return len(self._flights)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return counters for display."""
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._flights)}
+
+
+# Process-wide coalescer shared by every session
+REQUEST_COALESCER = SingleFlight()
@@ -0,0 +1,165 @@
+"""
+Local stub of an OpenAI-compatible inference server.
+
+Serves /v1/chat/completions (streamed or not, with usage) and /v1/models
+with configurable time-to-first-token, per-token delay and error rate, so
+backends, the LLM worker and load tests can be exercised without network
+access or API spend. Responses echo the prompt's words up to a fixed
+length, so every run is deterministic.
+
+Usage:
+    python stub_llm_server.py [--port 8765] [--models stub-fast,stub-large]
+        [--ttft-ms 200] [--token-ms 10] [--words 40] [--error-rate 0]
+
+Point a backend at it with "base_url": "http://127.0.0.1:8765/v1", or set
+OPENAI_BASE_URL=http://127.0.0.1:8765/v1 with any OPENAI_API_KEY.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+class StubSettings:
+    """Behavior of the stub server, shared by its request threads."""
+
+    def __init__(self, models: List[str], ttft_ms: float, token_ms: float, words: int, error_rate: float):
+        self.models = models
+        self.ttft_s = ttft_ms / 1000
+        self.token_s = token_ms / 1000
+        self.words = words
+        self.error_rate = error_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+
+def response_words(model: str, prompt: str, count: int) -> List[str]:
+    """Build a deterministic response: a header, then the prompt's words repeated."""
+    source = prompt.split() or ["ok"]
+    return [f"[{model}]"] + [source[i % len(source)] for i in range(count - 1)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handles the OpenAI endpoints used by the app."""
+
+    server_version = "StubLLM/1.0"
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+    @property
+    def settings(self) -> StubSettings:
+        return self.server.settings
+
+    def _json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._json(200, {"object": "list", "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "stub"} for model in self.settings.models
+            ]})
+        else:
+            self._json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        self.settings.count()
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length))
+            model = body["model"]
+            prompt = body["messages"][-1]["content"]
+        except (ValueError, KeyError, IndexError):
+            self._json(400, {"error": {"message": "Malformed chat completion request", "type": "invalid_request_error"}})
+            return
+        if model not in self.settings.models:
+            self._json(404, {"error": {"message": f"The model {model} does not exist", "type": "invalid_request_error"}})
+            return
+        if random.random() < self.settings.error_rate:
+            self._json(429, {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error"}})
+            return
+
+        words = response_words(model, prompt, self.settings.words)
+        usage = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(words), "total_tokens": len(prompt.split()) + len(words)}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        time.sleep(self.settings.ttft_s)
+
+        if not body.get("stream"):
+            time.sleep(self.settings.token_s * len(words))
+            self._json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def send(choices: List[Dict[str, Any]], **extra: Any):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": choices, **extra}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            for i, word in enumerate(words):
+                if i:
+                    time.sleep(self.settings.token_s)
+                send([{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}])
+            send([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                send([], usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the stream, e.g. a losing hedge attempt
+            pass
+
+
+def make_server(host: str, port: int, settings: StubSettings) -> ThreadingHTTPServer:
+    """Create a stub server; call serve_forever() to run it."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.settings = settings
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a stub OpenAI-compatible chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--models", default="stub-fast,stub-large", help="Comma-separated model names served")
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="Delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="Delay between tokens")
+    parser.add_argument("--words", type=int, default=40, help="Words per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    args = parser.parse_args()
+    settings = StubSettings(args.models.split(","), args.ttft_ms, args.token_ms, args.words, args.error_rate)
+    server = make_server(args.host, args.port, settings)
+    print(f"Stub LLM server on http://{args.host}:{args.port}/v1 serving {', '.join(settings.models)}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Performance telemetry for LLM calls and Streamlit render functions.
+
+Metrics are kept in a small in-process registry of labelled counters and
+histograms and can be exported in the Prometheus text format, either to a
+file that is rewritten periodically (METRICS_FILE) or over HTTP from a
+background server (METRICS_PORT).
+"""
+
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from constants import (
+    LATENCY_BUCKETS_S,
+    METRICS_EXPORT_INTERVAL_S,
+    RENDER_BUCKETS_S
+)
+from hedging import HEDGE_STATS
+from singleflight import REQUEST_COALESCER
+
+LabelValues = Tuple[str, ...]
+
+logger = logging.getLogger(__name__)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        """Increase the counter for a label set."""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        """Return a copy of all label sets and values."""
+        with self._lock:
+            return dict(self._values)
+
+    def exposition(self) -> List[str]:
+        """Render the counter in Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...], label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._series: Dict[LabelValues, Dict[str, object]] = {}
+
+    def observe(self, value: float, **labels: str):
+        """Record one observation for a label set."""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def series(self) -> Dict[LabelValues, Dict[str, object]]:
+        """Return a copy of all label sets and their bucket counts."""
+        with self._lock:
+            return {key: {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}
+                    for key, s in self._series.items()}
+
+    def quantile(self, q: float, counts: List[int], total: int) -> Optional[float]:
+        """Estimate a quantile from bucket counts by linear interpolation."""
+        if total == 0:
+            return None
+        rank = q * total
+        lower_bound, lower_count = 0.0, 0
+        for bound, count in zip(self.buckets, counts):
+            if count >= rank:
+                if count == lower_count:
+                    return bound
+                return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+            lower_bound, lower_count = bound, count
+        return self.buckets[-1]
+
+    def exposition(self) -> List[str]:
+        """Render the histogram in Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series().items()):
+            for bound, count in zip(self.buckets, series["counts"]):
+                labels = _format_labels(self.label_names, key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series['count']}")
+            plain = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{plain} {series['sum']:g}")
+            lines.append(f"{self.name}_count{plain} {series['count']}")
+        return lines
+
+
+LLM_LABELS = ("framework", "model")
+
+LLM_REQUESTS = Counter("llm_requests_total", "LLM calls by outcome.", LLM_LABELS + ("status",))
+LLM_ERRORS = Counter("llm_errors_total", "Failed LLM calls by error type.", LLM_LABELS + ("error_type",))
+LLM_RETRIES = Counter("llm_retries_total", "LLM calls retried on a fallback model.", LLM_LABELS)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens used by LLM calls.", LLM_LABELS + ("kind",))
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend in USD.", LLM_LABELS)
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "End-to-end LLM call latency.", LATENCY_BUCKETS_S, LLM_LABELS)
+LLM_TTFT = Histogram("llm_time_to_first_token_seconds", "Time to first streamed token.", LATENCY_BUCKETS_S, LLM_LABELS)
+RENDER_LATENCY = Histogram("app_render_duration_seconds", "Duration of Streamlit render functions.", RENDER_BUCKETS_S, ("function", "framework"))
+API_REQUESTS = Counter("api_requests_total", "HTTP API requests by route and status code.", ("route", "status"))
+API_LATENCY = Histogram("api_request_duration_seconds", "HTTP API request duration, including streaming.", LATENCY_BUCKETS_S, ("route",))
+
+METRICS = [
+    LLM_REQUESTS, LLM_ERRORS, LLM_RETRIES, LLM_TOKENS, LLM_COST, LLM_LATENCY, LLM_TTFT, RENDER_LATENCY,
+    API_REQUESTS, API_LATENCY
+]
+
+
+def record_llm_call(result, framework: str = ""):
+    """Record latency, TTFT, usage and cost of a completed call.
+
+    Args:
+        result: LLMResult returned by llm_runner.call_llm_detailed
+        framework: Framework label, or "" if not applicable
+    """
+    labels = {"framework": framework, "model": result.model}
+    LLM_REQUESTS.inc(status="coalesced" if result.coalesced else "ok", **labels)
+    LLM_LATENCY.observe(result.latency_s, **labels)
+    if result.ttft_s is not None:
+        LLM_TTFT.observe(result.ttft_s, **labels)
+    # Coalesced callers did not pay for their own tokens
+    if not result.coalesced:
+        LLM_TOKENS.inc(result.prompt_tokens, kind="prompt", **labels)
+        LLM_TOKENS.inc(result.completion_tokens, kind="completion", **labels)
+        LLM_TOKENS.inc(result.cached_tokens, kind="cached", **labels)
+        if result.cost_usd is not None:
+            LLM_COST.inc(result.cost_usd, **labels)
+
+
+def record_llm_error(error: BaseException, model: str, framework: str = ""):
+    """Record a failed call."""
+    LLM_REQUESTS.inc(framework=framework, model=model, status="error")
+    LLM_ERRORS.inc(framework=framework, model=model, error_type=type(error).__name__)
+
+
+def record_retry(model: str, framework: str = ""):
+    """Record that a call on model failed over to another model."""
+    LLM_RETRIES.inc(framework=framework, model=model)
+
+
+def record_api_request(route: str, status: int, duration_s: float):
+    """Record a finished HTTP API request."""
+    API_REQUESTS.inc(route=route, status=str(status))
+    API_LATENCY.observe(duration_s, route=route)
+
+
+def timed_render(fn: Callable) -> Callable:
+    """Decorator recording how long a render function takes.
+
+    The framework label is taken from the function's `framework` argument
+    when it has one.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            framework = signature.bind_partial(*args, **kwargs).arguments.get("framework", "")
+        except TypeError:
+            framework = ""
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            RENDER_LATENCY.observe(time.perf_counter() - started, function=fn.__name__, framework=framework)
+
+    return wrapper
+
+
+def render_prometheus() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.exposition())
+
+    hedges = HEDGE_STATS.snapshot()
+    coalescing = REQUEST_COALESCER.snapshot()
+    lines.extend([
+        "# HELP llm_hedges_fired_total Duplicate requests fired by hedging.",
+        "# TYPE llm_hedges_fired_total counter",
+        f"llm_hedges_fired_total {hedges['hedges_fired']}",
+        "# HELP llm_hedges_won_total Hedged duplicates that finished first.",
+        "# TYPE llm_hedges_won_total counter",
+        f"llm_hedges_won_total {hedges['hedges_won']}",
+        "# HELP llm_coalesced_requests_total Requests that joined an identical in-flight call.",
+        "# TYPE llm_coalesced_requests_total counter",
+        f"llm_coalesced_requests_total {coalescing['coalesced']}",
+        "# HELP llm_in_flight_requests Distinct LLM requests currently pending.",
+        "# TYPE llm_in_flight_requests gauge",
+        f"llm_in_flight_requests {coalescing['in_flight']}"
+    ])
+    return "\n".join(lines) + "\n"
+
+
+def summary_rows() -> List[Dict[str, object]]:
+    """Summarize LLM call metrics per framework and model for display."""
+    latency = LLM_LATENCY.series()
+    ttft = LLM_TTFT.series()
+    requests = LLM_REQUESTS.values()
+    tokens = LLM_TOKENS.values()
+    rows = []
+    for key in sorted(set(latency) | {k[:2] for k in requests}):
+        series = latency.get(key, {"counts": [], "sum": 0.0, "count": 0})
+        ttft_series = ttft.get(key, {"sum": 0.0, "count": 0})
+        rows.append({
+            "Framework": key[0] or "-",
+            "Model": key[1],
+            "Calls": series["count"],
+            "Errors": int(requests.get(key + ("error",), 0)),
+            "Coalesced": int(requests.get(key + ("coalesced",), 0)),
+            "p50 (s)": LLM_LATENCY.quantile(0.5, series["counts"], series["count"]),
+            "p95 (s)": LLM_LATENCY.quantile(0.95, series["counts"], series["count"]),
+            "Mean TTFT (s)": ttft_series["sum"] / ttft_series["count"] if ttft_series["count"] else None,
+            "Prompt Tokens": int(tokens.get(key + ("prompt",), 0)),
+            "Completion Tokens": int(tokens.get(key + ("completion",), 0)),
+            "Cached Tokens": int(tokens.get(key + ("cached",), 0))
+        })
+    return rows
+
+
+def render_summary_rows() -> List[Dict[str, object]]:
+    """Summarize render function timings for display."""
+    rows = []
+    for (function, framework), series in sorted(RENDER_LATENCY.series().items()):
+        rows.append({
+            "Function": function,
+            "Framework": framework or "-",
+            "Calls": series["count"],
+            "Mean (ms)": 1000 * series["sum"] / series["count"],
+            "p95 (ms)": 1000 * RENDER_LATENCY.quantile(0.95, series["counts"], series["count"])
+        })
+    return rows
+
+
+def write_metrics_file(path: str):
+    """Atomically write the current metrics to path."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_exporters(metrics_file: Optional[str] = None, port: Optional[int] = None, host: str = "127.0.0.1"):
+    """Start the background metrics file writer and/or HTTP endpoint.
+
+    Args:
+        metrics_file: Path rewritten every METRICS_EXPORT_INTERVAL_S, or None
+        port: Port serving GET /metrics, or None. If it cannot be bound, a
+            warning is logged and only the file writer runs.
+        host: Interface the metrics endpoint binds to
+    """
+    if metrics_file:
+        def write_forever():
+            while True:
+                try:
+                    write_metrics_file(metrics_file)
+                except OSError:
+                    pass
+                time.sleep(METRICS_EXPORT_INTERVAL_S)
+
+        threading.Thread(target=write_forever, name="metrics-file", daemon=True).start()
+
+    if port:
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            # Typically a second replica on the same host; metrics stay readable from the file and the app
+            logger.warning("Metrics endpoint not started on %s:%s: %s", host, port, e)
+            return
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
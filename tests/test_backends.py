@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from backends import Backend, BackendBusy, BackendRouter
+from stub_llm_server import StubSettings, make_server
+
+MESSAGES = [{"role": "user", "content": "route this request"}]
+
+
+@pytest.fixture
+def stub():
+    settings = StubSettings(["stub-fast", "stub-large"], ttft_ms=0, token_ms=5, words=20, error_rate=0.0)
+    server = make_server("127.0.0.1", 0, settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1", settings
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def router(stub):
+    base_url, _ = stub
+    return BackendRouter([
+        Backend(name="fast", models=["stub-fast"], base_url=base_url, api_key="unused", max_concurrency=1, queue_timeout_s=0.2),
+        Backend(name="large", models=["stub-large"], base_url=base_url, api_key="unused", max_concurrency=1, queue_timeout_s=0.2)
+    ])
+
+
+def in_flight(router, name):
+    return next(row["In Flight"] for row in router.snapshot() if row["Backend"] == name)
+
+
+def test_routes_each_model_to_its_backend(router, stub):
+    _, settings = stub
+    assert router.backend_for("stub-fast").name == "fast"
+    assert router.backend_for("stub-large").name == "large"
+    response = router.chat.completions.create(model="stub-large", messages=MESSAGES)
+    assert response.choices[0].message.content.startswith("[stub-large]")
+    assert settings.requests == 1
+    assert not router.requires_openai_key
+    with pytest.raises(ValueError):
+        router.backend_for("gpt-4o")
+
+
+def test_stream_holds_its_slot_until_consumed(router):
+    stream = router.chat.completions.create(model="stub-fast", messages=MESSAGES, stream=True)
+    assert in_flight(router, "fast") == 1
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+    assert text.startswith("[stub-fast]")
+    assert in_flight(router, "fast") == 0
+
+
+def test_busy_backend_rejects_then_frees_slot_on_close(router):
+    stream = router.chat.completions.create(model="stub-fast", messages=MESSAGES, stream=True)
+    with pytest.raises(BackendBusy):
+        router.chat.completions.create(model="stub-fast", messages=MESSAGES, stream=True)
+    # Other backends have their own slots
+    router.chat.completions.create(model="stub-large", messages=MESSAGES)
+
+    stream.close()
+    assert in_flight(router, "fast") == 0
+    response = router.chat.completions.create(model="stub-fast", messages=MESSAGES)
+    assert response.model == "stub-fast"
+
+
+def test_closing_twice_releases_once(router):
+    stream = router.chat.completions.create(model="stub-fast", messages=MESSAGES, stream=True)
+    stream.close()
+    stream.close()
+    assert in_flight(router, "fast") == 0
+    first = router.chat.completions.create(model="stub-fast", messages=MESSAGES, stream=True)
+    with pytest.raises(BackendBusy):
+        router.chat.completions.create(model="stub-fast", messages=MESSAGES)
+    first.close()
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from output_scoring import (
+    _BULLET_PATTERN,
+    _NUMBER_PATTERN,
+    _SECTION_PATTERN,
+    _WORD_PATTERN,
+    _count_per_doc
+)
+
+TEXTS = [
+    "one two",
+    "three",
+    "four five six",
+    "",
+    "## Plan\n- item 1\n- item 2\n",
+    "Summary:\n**Costs**\n1. $1,200 total\n2) 15% more",
+    "trailing text without newline 42",
+    "   \n\n"
+]
+
+
+@pytest.mark.parametrize("pattern", [_WORD_PATTERN, _SECTION_PATTERN, _BULLET_PATTERN, _NUMBER_PATTERN])
+def test_batched_counts_match_counting_each_document(pattern):
+    expected = [len(pattern.findall(text)) for text in TEXTS]
+    assert _count_per_doc(pattern, TEXTS).tolist() == expected
+
+
+def test_word_counts_have_no_separator_words():
+    assert np.array_equal(_count_per_doc(_WORD_PATTERN, ["one two", "three", "four five six"]), [2, 1, 3])
@@ -0,0 +1,231 @@
+"""
+Lightweight structured tracing for reruns and multi-stage runs.
+
+Spans nest through a context variable, so any code running inside a span,
+including jobs started with llm_runner.run_parallel, becomes its child. When
+the root span of a trace ends, the whole trace is kept in memory for the
+sidebar waterfall and, if TRACE_FILE is set, appended to that file as one
+line of OTLP/JSON (the format of the OpenTelemetry file exporter).
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from constants import TRACE_HISTORY_SIZE, TRACE_SERVICE_NAME
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class _Trace:
+    """Spans collected for one trace, shared by every span in it."""
+
+    def __init__(self, attributes: Dict[str, Any]):
+        self.trace_id = secrets.token_hex(16)
+        self.attributes = attributes
+        self.spans: List["Span"] = []
+        self.lock = threading.Lock()
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, name: str, trace: _Trace, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else ""
+        self.attributes = dict(trace.attributes, **attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        """Attach an attribute to the span."""
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any):
+        """Record a point-in-time event, e.g. the first streamed token."""
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    @property
+    def duration_s(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """Convert finished spans to an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": TRACE_SERVICE_NAME})},
+            "scopeSpans": [{
+                "scope": {"name": TRACE_SERVICE_NAME},
+                "spans": [
+                    {
+                        "traceId": span.trace.trace_id,
+                        "spanId": span.span_id,
+                        "parentSpanId": span.parent_span_id,
+                        "name": span.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": _otlp_attributes(span.attributes),
+                        "events": [
+                            {
+                                "name": event["name"],
+                                "timeUnixNano": str(event["time_ns"]),
+                                "attributes": _otlp_attributes(event["attributes"])
+                            }
+                            for event in span.events
+                        ],
+                        "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+                    }
+                    for span in spans
+                ]
+            }]
+        }]
+    }
+
+
+# Recently finished traces, newest last, for the sidebar waterfall
+RECENT_TRACES: Deque[List[Span]] = deque(maxlen=TRACE_HISTORY_SIZE)
+_export_lock = threading.Lock()
+
+
+def _export(spans: List[Span]):
+    RECENT_TRACES.append(spans)
+    path = os.environ.get("TRACE_FILE")
+    if not path:
+        return
+    line = json.dumps(to_otlp(spans), separators=(",", ":"))
+    try:
+        with _export_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass
+
+
+@contextmanager
+def span(name: str, trace_attributes: Optional[Dict[str, Any]] = None, **attributes: Any) -> Iterator[Span]:
+    """Open a span as a child of the current one, or as a new trace root.
+
+    Args:
+        name: Span name
+        trace_attributes: For root spans, attributes copied onto every span
+            in the trace (e.g. session and run ids)
+        **attributes: Attributes for this span only
+
+    Yields:
+        The open Span
+    """
+    parent = _current_span.get()
+    trace = parent.trace if parent else _Trace(trace_attributes or {})
+    current = Span(name, trace, parent, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        with trace.lock:
+            trace.spans.append(current)
+        if parent is None:
+            with trace.lock:
+                finished = sorted(trace.spans, key=lambda s: s.start_ns)
+            _export(finished)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes: Any):
+    """Record an already-finished child span, e.g. time spent queued."""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    finished = Span(name, parent.trace, parent, attributes)
+    finished.start_ns = start_ns
+    finished.end_ns = end_ns
+    with parent.trace.lock:
+        parent.trace.spans.append(finished)
+
+
+def latest_trace(**attributes: Any) -> Optional[List[Span]]:
+    """Return the newest finished trace whose root matches the given attributes."""
+    for spans in reversed(RECENT_TRACES):
+        root = next((s for s in spans if not s.parent_span_id), None)
+        if root and all(root.attributes.get(key) == value for key, value in attributes.items()):
+            return spans
+    return None
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost open span in this context, if any."""
+    return _current_span.get()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator running the function inside a span named after it."""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def waterfall_rows(spans: List[Span]) -> List[Dict[str, Any]]:
+    """Lay out a finished trace as rows with depth and offsets for display.
+
+    Returns:
+        One dict per span in depth-first order with name, depth, start
+        offset and duration in milliseconds
+    """
+    if not spans:
+        return []
+    trace_start = min(s.start_ns for s in spans)
+    children: Dict[str, List[Span]] = {}
+    for s in spans:
+        children.setdefault(s.parent_span_id, []).append(s)
+
+    rows = []
+
+    def visit(parent_id: str, depth: int):
+        for s in sorted(children.get(parent_id, []), key=lambda item: item.start_ns):
+            rows.append({
+                "name": s.name,
+                "depth": depth,
+                "offset_ms": (s.start_ns - trace_start) / 1e6,
+                "duration_ms": s.duration_s * 1000,
+                "error": s.error
+            })
+            visit(s.span_id, depth + 1)
+
+    visit("", 0)
+    return rows